@@ -8,20 +8,53 @@ import discord
 from discord.ext import commands, tasks
 import os
 import asyncio
-import traceback
 import json
+import time
 from datetime import datetime, timezone
 from utils.logger import setup_logger
 from utils.error_handler import ErrorHandler
 from config import BotConfig
 from commands.base_command import BaseCommand
+from keep_alive import update_bot_status as _update_ka_status
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # Optional: falls back to the default asyncio event loop
 
 # Setup logging
 logger = setup_logger('bot')
 
+# How long cached guild/member aggregates are trusted before a full rescan
+AGGREGATE_TTL = 60
+
+# Status loop runs every STATUS_TICK seconds; presence rotates every PRESENCE_EVERY ticks
+STATUS_TICK = 10
+PRESENCE_EVERY = 3
+
+# Unchanged keep-alive status is still re-sent this often (dashboard marks offline after 60s)
+KEEPALIVE_REFRESH = 30
+
+# Latency changes smaller than this many milliseconds don't count as a status change
+LATENCY_BUCKET_MS = 50
+
+# Guild join/leave bursts collapse into one presence update after this many seconds
+PRESENCE_DEBOUNCE = 2.0
+
 class AdvancedDiscordBot:
     """Advanced Discord bot with comprehensive error handling and monitoring."""
     
+    __slots__ = (
+        'config', 'token', 'bot', 'error_handler',
+        'start_time', '_start_monotonic', 'commands_executed', 'errors_handled',
+        'guilds_joined', 'guilds_left', 'messages_seen',
+        '_guild_count', '_member_count', '_aggregates_refreshed',
+        '_tick', 'status_updater',
+        '_static_activities', '_activities', '_activity_counts', '_presence_idx',
+        '_presence_handle', '_presence_task',
+        '_last_ka_snapshot', '_last_ka_push'
+    )
+    
     def __init__(self):
         # Bot configuration
         self.config = BotConfig()
@@ -43,7 +76,7 @@ class AdvancedDiscordBot:
             command_prefix=self.config.PREFIX,
             intents=intents,
             help_command=None,
-            case_insensitive=True,
+            case_insensitive=False,  # all command names are lowercase, see _check_command_names
             strip_after_prefix=True
         )
         
@@ -51,79 +84,108 @@ class AdvancedDiscordBot:
         self.error_handler = ErrorHandler()
         
         # Bot statistics
-        self.stats = {
-            'start_time': None,
-            'commands_executed': 0,
-            'errors_handled': 0,
-            'guilds_joined': 0,
-            'guilds_left': 0,
-            'messages_seen': 0
-        }
+        self.start_time = None
+        self._start_monotonic = None
+        self.commands_executed = 0
+        self.errors_handled = 0
+        self.guilds_joined = 0
+        self.guilds_left = 0
+        self.messages_seen = 0
+        
+        # Cached guild/member aggregates, kept current by guild events
+        self._guild_count = 0
+        self._member_count = 0
+        self._aggregates_refreshed = 0.0
+        
+        # Combined status loop; built per instance since slotted objects
+        # can't cache a class-level tasks.loop
+        self._tick = 0
+        self.status_updater = tasks.loop(seconds=STATUS_TICK)(self._status_tick)
+        self.status_updater.before_loop(self.bot.wait_until_ready)
+        
+        # Presence activities; count-based ones are rebuilt only when counts change
+        self._static_activities = [
+            discord.Activity(type=discord.ActivityType.watching, name=name)
+            for name in (f"Prefix: {self.config.PREFIX}", "Advanced Bot System")
+        ]
+        self._activities = list(self._static_activities)
+        self._activity_counts = None
+        self._presence_idx = 0
+        self._presence_handle = None
+        self._presence_task = None
+        
+        # Last status pushed to the keep-alive server
+        self._last_ka_snapshot = None
+        self._last_ka_push = 0.0
         
+        # Let cogs reach the cached status snapshot
+        self.bot.advanced_bot = self
+        
+        self.bot.setup_hook = self.setup_hook
         self.setup_events()
         self.setup_error_handling()
         
+    async def setup_hook(self):
+        """Load commands and start background tasks once, before connecting to the gateway."""
+        # Load all command modules
+        await self.load_commands()
+        
+        # Start background tasks (the loop waits for READY before its first tick)
+        if not self.status_updater.is_running():
+            self.status_updater.start()
+            
     def setup_events(self):
         """Setup bot event handlers."""
         
         @self.bot.event
         async def on_ready():
             """Called when bot is ready and connected."""
-            self.stats['start_time'] = datetime.now(timezone.utc)
+            self.start_time = datetime.now(timezone.utc)
+            self._start_monotonic = time.monotonic()
+            self.refresh_aggregates()
             
-            logger.info(f"Bot logged in as {self.bot.user}")
-            logger.info(f"Bot ID: {self.bot.user.id}")
-            logger.info(f"Connected to {len(self.bot.guilds)} guilds")
-            logger.info(f"Serving {sum(g.member_count for g in self.bot.guilds)} users")
-            
-            # Start background tasks
-            if not self.status_updater.is_running():
-                self.status_updater.start()
-                
-            if not self.ping_task.is_running():
-                self.ping_task.start()
-                
-            # Set initial status
-            await self.update_bot_status()
+            logger.info(
+                "Bot logged in as %s (ID: %s) - connected to %d guilds, serving %d users",
+                self.bot.user, self.bot.user.id, self._guild_count, self._member_count
+            )
             
-            # Load all command modules
-            await self.load_commands()
+            # Set initial status without holding up READY handling
+            self._presence_task = asyncio.create_task(self.update_bot_status())
             
         @self.bot.event
         async def on_guild_join(guild):
             """Called when bot joins a guild."""
-            self.stats['guilds_joined'] += 1
+            self.guilds_joined += 1
+            self._guild_count += 1
+            self._member_count += guild.member_count or 0
             logger.info(f"Joined guild: {guild.name} (ID: {guild.id})")
-            await self.update_bot_status()
+            self._schedule_presence_update()
             
         @self.bot.event
         async def on_guild_remove(guild):
             """Called when bot leaves a guild."""
-            self.stats['guilds_left'] += 1
+            self.guilds_left += 1
+            self._guild_count = max(self._guild_count - 1, 0)
+            self._member_count = max(self._member_count - (guild.member_count or 0), 0)
             logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
-            await self.update_bot_status()
-            
-        @self.bot.event
-        async def on_message(message):
-            """Called for every message."""
-            if message.author == self.bot.user:
-                return
-                
-            self.stats['messages_seen'] += 1
+            self._schedule_presence_update()
             
-            # Process commands
-            await self.bot.process_commands(message)
+        @self.bot.listen('on_message')
+        async def count_message(message):
+            """Count messages; command dispatch is left to the default on_message."""
+            if not message.author.bot:
+                self.messages_seen += 1
             
         @self.bot.event
         async def on_command(ctx):
             """Called before command execution."""
-            self.stats['commands_executed'] += 1
+            self.commands_executed += 1
             logger.info(f"Command '{ctx.command}' executed by {ctx.author} in {ctx.guild}")
             
         @self.bot.event
         async def on_command_error(ctx, error):
             """Global command error handler."""
-            self.stats['errors_handled'] += 1
+            self.errors_handled += 1
             await self.error_handler.handle_command_error(ctx, error)
             
     def setup_error_handling(self):
@@ -132,97 +194,162 @@ class AdvancedDiscordBot:
         @self.bot.event
         async def on_error(event, *args, **kwargs):
             """Global error handler for non-command errors."""
-            self.stats['errors_handled'] += 1
-            logger.error(f"Error in event {event}: {traceback.format_exc()}")
+            self.errors_handled += 1
+            # Traceback is formatted lazily by the handler
+            logger.exception("Error in event %s", event)
             
-    @tasks.loop(seconds=30)
-    async def status_updater(self):
-        """Update bot status periodically."""
+    async def _status_tick(self):
+        """Push keep-alive status every tick and rotate presence every few ticks."""
         try:
-            await self.update_bot_status()
-        except Exception as e:
-            logger.error(f"Error updating status: {e}")
+            self._tick += 1
+            snapshot = self.get_status_snapshot()
             
-    @tasks.loop(seconds=20)
-    async def ping_task(self):
-        """Keep-alive ping task to maintain bot activity."""
-        try:
             # Log bot heartbeat
-            latency = round(self.bot.latency * 1000)
-            logger.debug(f"Bot heartbeat - Latency: {latency}ms")
-            
-            # Update keep-alive server with bot status
-            await self.update_keepalive_status()
-            
+            logger.debug(f"Bot heartbeat - Latency: {snapshot['latency']}ms")
+            
+            if self._tick % PRESENCE_EVERY == 0:
+                # Keep-alive and presence updates are both due, run them together
+                results = await asyncio.gather(
+                    self.update_keepalive_status(snapshot),
+                    self.update_bot_status(snapshot),
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.error(f"Error in status loop: {result}")
+            else:
+                # Update keep-alive server with bot status
+                await self.update_keepalive_status(snapshot)
+                
         except Exception as e:
-            logger.error(f"Error in ping task: {e}")
+            logger.error(f"Error in status loop: {e}")
             
-    async def update_bot_status(self):
+    async def update_bot_status(self, snapshot=None):
         """Update bot's Discord status."""
         try:
-            guild_count = len(self.bot.guilds)
-            user_count = sum(g.member_count for g in self.bot.guilds)
-            
-            status_messages = [
-                f"Serving {guild_count} servers",
-                f"Helping {user_count:,} users",
-                f"Prefix: {self.config.PREFIX}",
-                "Advanced Bot System"
-            ]
-            
+            if snapshot is None:
+                snapshot = self.get_status_snapshot()
+                
+            counts = (snapshot['guilds'], snapshot['users'])
+            if counts != self._activity_counts:
+                self._activities = [
+                    discord.Activity(type=discord.ActivityType.watching, name=f"Serving {counts[0]} servers"),
+                    discord.Activity(type=discord.ActivityType.watching, name=f"Helping {counts[1]:,} users"),
+                    *self._static_activities
+                ]
+                self._activity_counts = counts
+                
             # Rotate status messages
-            import random
-            status = random.choice(status_messages)
+            self._presence_idx = (self._presence_idx + 1) % len(self._activities)
             
             await self.bot.change_presence(
-                activity=discord.Activity(
-                    type=discord.ActivityType.watching,
-                    name=status
-                ),
+                activity=self._activities[self._presence_idx],
                 status=discord.Status.online
             )
             
         except Exception as e:
             logger.error(f"Error updating bot status: {e}")
             
-    async def update_keepalive_status(self):
+    def _schedule_presence_update(self):
+        """Update presence once guild events have been quiet for PRESENCE_DEBOUNCE seconds."""
+        if self._presence_handle:
+            self._presence_handle.cancel()
+            
+        def fire():
+            self._presence_handle = None
+            self._presence_task = asyncio.create_task(self.update_bot_status())
+            
+        self._presence_handle = asyncio.get_running_loop().call_later(PRESENCE_DEBOUNCE, fire)
+        
+    async def update_keepalive_status(self, snapshot=None):
         """Update keep-alive server with current bot status."""
         try:
-            from keep_alive import update_bot_status
-            
-            status_data = {
+            if snapshot is None:
+                snapshot = self.get_status_snapshot()
+            
+            # Skip unchanged status until it needs refreshing. Stats counters move with any
+            # traffic, so only the headline figures decide whether the status changed.
+            key = (True, snapshot['guilds'], snapshot['users'], snapshot['latency'] // LATENCY_BUCKET_MS)
+            now = time.monotonic()
+            if key == self._last_ka_snapshot and now - self._last_ka_push < KEEPALIVE_REFRESH:
+                return
+                
+            self._last_ka_snapshot = key
+            self._last_ka_push = now
+            _update_ka_status({
                 'online': True,
-                'latency': round(self.bot.latency * 1000),
-                'guilds': len(self.bot.guilds),
-                'users': sum(g.member_count for g in self.bot.guilds),
-                'uptime': self.get_uptime(),
-                'stats': self.stats.copy()
-            }
-            
-            update_bot_status(status_data)
+                'latency': snapshot['latency'],
+                'guilds': snapshot['guilds'],
+                'users': snapshot['users'],
+                'stats': self.get_stats(),
+                'uptime': self.get_uptime()
+            })
             
         except Exception as e:
             logger.error(f"Error updating keep-alive status: {e}")
             
+    def refresh_aggregates(self):
+        """Recompute guild and member totals from the guild cache."""
+        self._guild_count = len(self.bot.guilds)
+        self._member_count = sum(g.member_count or 0 for g in self.bot.guilds)
+        self._aggregates_refreshed = time.monotonic()
+        
+    def get_status_snapshot(self):
+        """
+        Get cached guild/member totals and current latency.
+        
+        Totals are maintained incrementally by guild events and only
+        rescanned once they are older than AGGREGATE_TTL seconds.
+        
+        Returns:
+            dict: Snapshot with 'guilds', 'users' and 'latency' keys
+        """
+        if time.monotonic() - self._aggregates_refreshed > AGGREGATE_TTL:
+            self.refresh_aggregates()
+            
+        return {
+            'guilds': self._guild_count,
+            'users': self._member_count,
+            'latency': round(self.bot.latency * 1000)
+        }
+        
+    def get_stats(self):
+        """Get bot statistics as a dictionary."""
+        return {
+            'start_time': self.start_time,
+            'commands_executed': self.commands_executed,
+            'errors_handled': self.errors_handled,
+            'guilds_joined': self.guilds_joined,
+            'guilds_left': self.guilds_left,
+            'messages_seen': self.messages_seen
+        }
+        
     def get_uptime(self):
         """Get bot uptime in seconds."""
-        if self.stats['start_time']:
-            return int((datetime.now(timezone.utc) - self.stats['start_time']).total_seconds())
+        if self._start_monotonic:
+            return int(time.monotonic() - self._start_monotonic)
         return 0
         
-    def add_cog(self, cog):
+    async def add_cog(self, cog):
         """Add a command cog to the bot."""
         try:
-            asyncio.create_task(self.bot.add_cog(cog))
+            await self.bot.add_cog(cog)
             logger.info(f"Added cog: {cog.__class__.__name__}")
         except Exception as e:
             logger.error(f"Error adding cog {cog.__class__.__name__}: {e}")
             
+    async def _start(self):
+        """Connect the bot and run until it is closed."""
+        async with self.bot:
+            await self.bot.start(self.token)
+            
     def run_bot(self):
-        """Run the Discord bot."""
+        """Run the Discord bot, on uvloop when it is installed."""
         try:
-            logger.info("Starting Discord bot connection...")
-            self.bot.run(self.token, log_handler=None)  # Disable discord.py logging
+            logger.info(f"Starting Discord bot connection ({'uvloop' if uvloop else 'asyncio'} event loop)...")
+            # Equivalent to bot.run() without its logging setup, but lets us pick the loop
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+                runner.run(self._start())
         except discord.LoginFailure:
             logger.error("Invalid Discord token provided")
             raise
@@ -242,8 +369,9 @@ class AdvancedDiscordBot:
             if self.status_updater.is_running():
                 self.status_updater.stop()
                 
-            if self.ping_task.is_running():
-                self.ping_task.stop()
+            if self._presence_handle:
+                self._presence_handle.cancel()
+                self._presence_handle = None
                 
             # Close bot connection
             await self.bot.close()
@@ -252,6 +380,13 @@ class AdvancedDiscordBot:
         except Exception as e:
             logger.error(f"Error during bot shutdown: {e}")
             
+    def _check_command_names(self):
+        """Warn about command names or aliases that lowercase input can't reach."""
+        for command in self.bot.walk_commands():
+            for name in (command.name, *command.aliases):
+                if name != name.lower():
+                    logger.warning(f"Command name '{name}' is not lowercase and is matched case-sensitively")
+                    
     async def load_commands(self):
         """Load all command modules."""
         try:
@@ -275,6 +410,7 @@ class AdvancedDiscordBot:
             await self.bot.add_cog(ExampleCommand(self.bot))
             logger.info("Loaded example commands")
             
+            self._check_command_names()
             logger.info("All command modules loaded successfully!")
             
         except Exception as e:
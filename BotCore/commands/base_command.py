@@ -5,6 +5,7 @@ Provides common functionality and structure for all bot commands.
 """
 
 import discord
+import logging
 from discord.ext import commands
 from datetime import datetime, timezone
 from utils.logger import setup_logger
@@ -18,6 +19,12 @@ class BaseCommand(commands.Cog):
     Provides common functionality like logging, error handling, and utilities.
     """
     
+    # Shared embed colors
+    _C_GREEN = discord.Color.green()
+    _C_RED = discord.Color.red()
+    _C_YELLOW = discord.Color.yellow()
+    _C_BLUE = discord.Color.blue()
+    
     def __init__(self, bot):
         self.bot = bot
         self.command_count = 0
@@ -26,14 +33,18 @@ class BaseCommand(commands.Cog):
     async def cog_before_invoke(self, ctx):
         """Called before every command in this cog."""
         self.command_count += 1
-        self.last_used = datetime.now(timezone.utc)
+        # Reuse the message timestamp instead of reading the clock again
+        self.last_used = ctx.message.created_at
         
         # Log command usage
-        logger.log_command_usage(
-            command=ctx.command.qualified_name,
-            user=f"{ctx.author} ({ctx.author.id})",
-            guild=f"{ctx.guild.name} ({ctx.guild.id})" if ctx.guild else "DM"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.log_command_usage(
+                command=ctx.command.qualified_name,
+                user=ctx.author,
+                user_id=ctx.author.id,
+                guild=ctx.guild,
+                guild_id=ctx.guild.id if ctx.guild else None
+            )
         
     async def cog_after_invoke(self, ctx):
         """Called after every command in this cog."""
@@ -43,7 +54,7 @@ class BaseCommand(commands.Cog):
         """Handle errors in this cog."""
         await global_error_handler.handle_command_error(ctx, error)
         
-    def create_embed(self, title=None, description=None, color=None):
+    def create_embed(self, title=None, description=None, color=None, timestamp=None):
         """
         Create a standard embed with common formatting.
         
@@ -51,52 +62,58 @@ class BaseCommand(commands.Cog):
             title: Embed title
             description: Embed description
             color: Embed color (defaults to bot's theme color)
+            timestamp: Embed timestamp (defaults to now); pass an existing
+                timestamp such as ctx.message.created_at to avoid reading the clock
             
         Returns:
             discord.Embed: Configured embed
         """
         if color is None:
-            color = discord.Color.blue()
+            color = self._C_BLUE
             
         embed = discord.Embed(
             title=title,
             description=description,
             color=color,
-            timestamp=datetime.now(timezone.utc)
+            timestamp=timestamp or datetime.now(timezone.utc)
         )
         
         return embed
         
-    def create_success_embed(self, title, description=None):
+    def create_success_embed(self, title, description=None, timestamp=None):
         """Create a success embed (green)."""
         return self.create_embed(
             title=f"✅ {title}",
             description=description,
-            color=discord.Color.green()
+            color=self._C_GREEN,
+            timestamp=timestamp
         )
         
-    def create_error_embed(self, title, description=None):
+    def create_error_embed(self, title, description=None, timestamp=None):
         """Create an error embed (red)."""
         return self.create_embed(
             title=f"❌ {title}",
             description=description,
-            color=discord.Color.red()
+            color=self._C_RED,
+            timestamp=timestamp
         )
         
-    def create_warning_embed(self, title, description=None):
+    def create_warning_embed(self, title, description=None, timestamp=None):
         """Create a warning embed (yellow)."""
         return self.create_embed(
             title=f"⚠️ {title}",
             description=description,
-            color=discord.Color.yellow()
+            color=self._C_YELLOW,
+            timestamp=timestamp
         )
         
-    def create_info_embed(self, title, description=None):
+    def create_info_embed(self, title, description=None, timestamp=None):
         """Create an info embed (blue)."""
         return self.create_embed(
             title=f"ℹ️ {title}",
             description=description,
-            color=discord.Color.blue()
+            color=self._C_BLUE,
+            timestamp=timestamp
         )
         
     async def send_embed(self, ctx, embed):
@@ -110,16 +127,23 @@ class BaseCommand(commands.Cog):
         Returns:
             discord.Message or None if failed
         """
+        # Go straight to plain text where the bot can't embed links
+        if ctx.guild and not ctx.channel.permissions_for(ctx.guild.me).embed_links:
+            return await self._send_plain_fallback(ctx, embed)
+            
         try:
             return await ctx.send(embed=embed)
         except discord.HTTPException as e:
             logger.error(f"Failed to send embed: {e}")
-            # Try sending plain text fallback
-            try:
-                return await ctx.send(f"**{embed.title}**\n{embed.description}")
-            except discord.HTTPException:
-                logger.error("Failed to send fallback message")
-                return None
+            return await self._send_plain_fallback(ctx, embed)
+            
+    async def _send_plain_fallback(self, ctx, embed):
+        """Send an embed's title and description as plain text."""
+        try:
+            return await ctx.send(f"**{embed.title}**\n{embed.description or ''}")
+        except discord.HTTPException:
+            logger.error("Failed to send fallback message")
+            return None
                 
     def get_user_permissions(self, member):
         """
@@ -164,7 +188,8 @@ class ExampleCommand(BaseCommand):
         
         embed = self.create_info_embed(
             title="Pong! 🏓",
-            description=f"Bot latency: `{latency}ms`"
+            description=f"Bot latency: `{latency}ms`",
+            timestamp=ctx.message.created_at
         )
         
         await self.send_embed(ctx, embed)
@@ -174,12 +199,23 @@ class ExampleCommand(BaseCommand):
         """Get basic bot information."""
         embed = self.create_info_embed(
             title="Bot Information",
-            description="Advanced Discord Bot System"
+            description="Advanced Discord Bot System",
+            timestamp=ctx.message.created_at
         )
         
-        embed.add_field(name="Guilds", value=len(self.bot.guilds), inline=True)
-        embed.add_field(name="Users", value=sum(g.member_count for g in self.bot.guilds), inline=True)
-        embed.add_field(name="Latency", value=f"{round(self.bot.latency * 1000)}ms", inline=True)
+        advanced_bot = getattr(self.bot, 'advanced_bot', None)
+        if advanced_bot:
+            snapshot = advanced_bot.get_status_snapshot()
+        else:
+            snapshot = {
+                'guilds': len(self.bot.guilds),
+                'users': sum(g.member_count or 0 for g in self.bot.guilds),
+                'latency': round(self.bot.latency * 1000)
+            }
+        
+        embed.add_field(name="Guilds", value=snapshot['guilds'], inline=True)
+        embed.add_field(name="Users", value=snapshot['users'], inline=True)
+        embed.add_field(name="Latency", value=f"{snapshot['latency']}ms", inline=True)
         
         await self.send_embed(ctx, embed)
         
@@ -6,20 +6,84 @@ Allows moderators to send messages as the bot with format options and reply func
 
 import discord
 from discord.ext import commands
+import asyncio
+import time
+from collections import OrderedDict
 from .base_command import BaseCommand
 from utils.logger import setup_logger
 
 logger = setup_logger('echo_command')
 
+# Embed colors accepted by echoembed, built once at import
+_COLOR_MAP = {
+    "red": discord.Color.red(),
+    "green": discord.Color.green(),
+    "blue": discord.Color.blue(),
+    "yellow": discord.Color.yellow(),
+    "purple": discord.Color.purple(),
+    "orange": discord.Color.orange(),
+    "pink": discord.Color.magenta(),
+    "teal": discord.Color.teal(),
+    "dark_blue": discord.Color.dark_blue(),
+    "dark_green": discord.Color.dark_green(),
+    "dark_red": discord.Color.dark_red(),
+    "gold": discord.Color.gold()
+}
+_DEFAULT_COLOR = _COLOR_MAP["blue"]
+
+# How long a fetched reply target is reused before fetching again
+MESSAGE_CACHE_TTL = 60
+MESSAGE_CACHE_MAX = 128  # Least recently used targets are dropped beyond this
+
+# Either permission is enough to use the echo commands
+_MOD_MASK = discord.Permissions(manage_messages=True, administrator=True).value
+
 class EchoCommand(BaseCommand):
     """Advanced echo command with text format options and reply functionality."""
     
     def __init__(self, bot):
         super().__init__(bot)
+        self._msg_cache = OrderedDict()  # (channel_id, message_id) -> (fetched_at, fetch task), LRU order
         
+    async def _get_message(self, channel, message_id):
+        """
+        Fetch a message, sharing one API call between concurrent and repeated lookups.
+        
+        Args:
+            channel: Channel the message lives in
+            message_id: ID of the message to fetch
+            
+        Returns:
+            discord.Message: The fetched message
+        """
+        now = time.monotonic()
+        key = (channel.id, message_id)
+        entry = self._msg_cache.get(key)
+        
+        # Expired entries are replaced when they are looked up
+        if entry is None or now - entry[0] > MESSAGE_CACHE_TTL:
+            task = asyncio.create_task(channel.fetch_message(message_id))
+            task.add_done_callback(lambda t: self._fetch_done(key, t))
+            entry = (now, task)
+            self._msg_cache[key] = entry
+            self._msg_cache.move_to_end(key)
+            if len(self._msg_cache) > MESSAGE_CACHE_MAX:
+                self._msg_cache.popitem(last=False)
+        else:
+            self._msg_cache.move_to_end(key)
+            
+        return await asyncio.shield(entry[1])
+        
+    def _fetch_done(self, key, task):
+        """Drop failed fetches from the cache, retrieving their error even if no caller is left waiting."""
+        if task.cancelled() or task.exception() is not None:
+            entry = self._msg_cache.get(key)
+            if entry is not None and entry[1] is task:
+                del self._msg_cache[key]
+                
     async def cog_check(self, ctx):
         """Check if user has moderation permissions."""
-        return ctx.author.guild_permissions.manage_messages or ctx.author.guild_permissions.administrator
+        return bool(ctx.author.guild_permissions.value & _MOD_MASK)
         
     @commands.command(name='echo', help='Send a message as the bot with format options')
     async def echo_message(self, ctx, message: str, text_format: str = "plain", message_id: int = None):
@@ -39,7 +103,7 @@ class EchoCommand(BaseCommand):
             reply_to = None
             if message_id:
                 try:
-                    reply_to = await ctx.channel.fetch_message(message_id)
+                    reply_to = await self._get_message(ctx.channel, message_id)
                 except discord.NotFound:
                     # Send error in DM to avoid revealing who used the command
                     try:
@@ -60,7 +124,7 @@ class EchoCommand(BaseCommand):
                 embed = discord.Embed(
                     description=message,
                     color=discord.Color.blue(),
-                    timestamp=discord.utils.utcnow()
+                    timestamp=ctx.message.created_at
                 )
                 
                 # Send the embed
@@ -118,7 +182,7 @@ class EchoCommand(BaseCommand):
             reply_to = None
             if message_id:
                 try:
-                    reply_to = await ctx.channel.fetch_message(message_id)
+                    reply_to = await self._get_message(ctx.channel, message_id)
                 except discord.NotFound:
                     try:
                         await ctx.author.send("❌ Message with that ID not found.")
@@ -127,29 +191,14 @@ class EchoCommand(BaseCommand):
                     return
                     
             # Parse color
-            color_map = {
-                "red": discord.Color.red(),
-                "green": discord.Color.green(),
-                "blue": discord.Color.blue(),
-                "yellow": discord.Color.yellow(),
-                "purple": discord.Color.purple(),
-                "orange": discord.Color.orange(),
-                "pink": discord.Color.magenta(),
-                "teal": discord.Color.teal(),
-                "dark_blue": discord.Color.dark_blue(),
-                "dark_green": discord.Color.dark_green(),
-                "dark_red": discord.Color.dark_red(),
-                "gold": discord.Color.gold()
-            }
-            
-            embed_color = color_map.get(color.lower(), discord.Color.blue())
+            embed_color = _COLOR_MAP.get(color.lower(), _DEFAULT_COLOR)
             
             # Create the embed
             embed = discord.Embed(
                 title=title,
                 description=description,
                 color=embed_color,
-                timestamp=discord.utils.utcnow()
+                timestamp=ctx.message.created_at
             )
             
             # Send the embed
@@ -186,7 +235,7 @@ class EchoCommand(BaseCommand):
                 title=f"📢 {title}",
                 description=description,
                 color=discord.Color.gold(),
-                timestamp=discord.utils.utcnow()
+                timestamp=ctx.message.created_at
             )
             embed.set_footer(text="Official Announcement")
             
@@ -7,82 +7,458 @@ Comprehensive moderation system with slash commands
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 import asyncio
-import re
+import heapq
+import json
+import os
+import time
 from .base_command import BaseCommand
+from config import config
+from utils.logger import setup_logger
+
+logger = setup_logger('moderation')
+
+_UTC = timezone.utc
+
+# Seconds per unit suffix in duration strings like '30m', '1h', '7d'
+_DURATION_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Longest accepted duration; longer temporary bans should be permanent ones
+MAX_DURATION = 365 * 86400
+# Discord rejects member timeouts longer than 28 days
+MUTE_MAX_DURATION = 28 * 86400
+
+# Upper bound in seconds for a single Discord API action
+API_TIMEOUT = 15
+PURGE_TIMEOUT = 60  # purge falls back to one request per message older than 14 days
+
+# Backoff in seconds between retries of a failed automatic unban
+UNBAN_RETRY_DELAY = 30
+UNBAN_RETRY_MAX = 3600
+
+# A refused DM isn't retried for this many seconds; users can re-enable DMs
+DM_BLOCKED_TTL = 15 * 60
+# Forget the oldest DM-blocked user once this many are tracked
+DM_BLOCKED_MAX = 10000
+
+# Longest a ban or kick waits on the DM telling the user about it
+DM_WAIT = 2.0
+
+# Permission bits checked by the commands
+_BAN_MEMBERS = discord.Permissions(ban_members=True).value
+_KICK_MEMBERS = discord.Permissions(kick_members=True).value
+_MODERATE_MEMBERS = discord.Permissions(moderate_members=True).value
+_MANAGE_MESSAGES = discord.Permissions(manage_messages=True).value
+_MANAGE_CHANNELS = discord.Permissions(manage_channels=True).value
+
+# (title, description) of error replies shared by several commands
+_ERR_TIMED_OUT = ("Timed Out", "Discord took too long to respond. Please try again.")
+
+# Permission-denied replies by command name
+_ERR_DENIED = {
+    'ban': ("Permission Denied", "You don't have permission to ban members."),
+    'unban': ("Permission Denied", "You don't have permission to unban members."),
+    'kick': ("Permission Denied", "You don't have permission to kick members."),
+    'mute': ("Permission Denied", "You don't have permission to moderate members."),
+    'unmute': ("Permission Denied", "You don't have permission to moderate members."),
+    'warn': ("Permission Denied", "You don't have permission to warn members."),
+    'clear': ("Permission Denied", "You don't have permission to manage messages."),
+    'slowmode': ("Permission Denied", "You don't have permission to manage channels.")
+}
+
+# Command name -> what it was doing, for the generic error reply
+_ERROR_ACTIONS = {
+    'ban': "banning the user",
+    'unban': "unbanning the user",
+    'kick': "kicking the user",
+    'mute': "muting the user",
+    'unmute': "unmuting the user",
+    'warn': "warning the user",
+    'clear': "clearing messages",
+    'slowmode': "setting slowmode"
+}
+
+# Client-side rate limits as route -> (requests, per seconds), applied per guild
+_RATE_LIMITS = {
+    'purge': (2, 5.0),
+    'channel_edit': (5, 10.0)
+}
+
+class MuteInfo:
+    """Record of an active mute."""
+    
+    __slots__ = ('until', 'reason', 'moderator')
+    
+    def __init__(self, until, reason, moderator):
+        self.until = until
+        self.reason = reason
+        self.moderator = moderator
 
 class ModerationCommands(BaseCommand):
     """Advanced moderation slash commands with comprehensive features."""
     
     def __init__(self, bot):
         super().__init__(bot)
-        self.muted_users = {}  # Store muted users with expiration times
+        self.muted_users = {}  # user_id -> MuteInfo
+        self._mute_heap = []  # (expiry_timestamp, user_id), oldest expiry first
+        
+        # Timed bans as (guild_id, user_id) -> unban_timestamp, persisted to disk
+        self._unban_at = {}
+        # Heap of (unban_timestamp, guild_id, user_id); entries no longer in _unban_at are skipped
+        self._pending_unbans = []
+        self._unban_retries = {}  # (guild_id, user_id) -> failed automatic unban attempts
+        self._wakeup = asyncio.Event()  # Wakes the worker when either heap changes
+        
+        # Token buckets as (route, guild_id) -> (tokens, last_refill)
+        self._buckets = {}
+        
+        # User ID -> monotonic time their DM was refused, oldest first; not retried for DM_BLOCKED_TTL
+        self._dm_blocked = {}
+        self._dm_tasks = set()  # DMs still in flight after their action went ahead
+        self._loop = None
+        self._unban_task = None
+        
+    async def cog_load(self):
+        """Restore scheduled unbans and start the unban worker."""
+        self._loop = asyncio.get_running_loop()
+        self._load_unbans()
+        self._unban_task = self._loop.create_task(self._unban_worker())
+        
+    async def cog_unload(self):
+        """Stop the unban worker; pending unbans stay on disk."""
+        if self._unban_task:
+            self._unban_task.cancel()
+            
+    async def cog_app_command_error(self, interaction, error):
+        """Reply to errors a command didn't handle itself."""
+        if isinstance(error, app_commands.CommandInvokeError):
+            error = error.original
+            
+        if isinstance(error, TimeoutError):
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_TIMED_OUT))
+            return
+            
+        command = interaction.command.name if interaction.command else None
+        logger.error("Error in /%s: %s", command, error, exc_info=error)
+        action = _ERROR_ACTIONS.get(command, "running this command")
+        await self.send_embed(interaction, self.create_error_embed("Error", f"An error occurred while {action}."))
         
     async def send_embed(self, interaction, embed):
         """Send an embed response for slash commands."""
+        response = interaction.response
+        done = response.is_done()
+        send = interaction.followup.send if done else response.send_message
         try:
-            if interaction.response.is_done():
-                await interaction.followup.send(embed=embed)
-            else:
-                await interaction.response.send_message(embed=embed)
+            await send(embed=embed)
             return True
         except discord.HTTPException:
+            # A failed initial response may still have been acknowledged
+            if not done and response.is_done():
+                send = interaction.followup.send
             try:
-                content = f"**{embed.title}**\n{embed.description or ''}"
-                if interaction.response.is_done():
-                    await interaction.followup.send(content)
-                else:
-                    await interaction.response.send_message(content)
+                await send(f"**{embed.title}**\n{embed.description or ''}")
                 return True
             except discord.HTTPException:
                 return False
         
-    def _parse_duration(self, duration_str):
-        """Parse duration string like '1h', '30m', '7d' into datetime."""
+    async def _take(self, route, guild_id):
+        """
+        Take a token from the route's bucket for this guild, waiting if it is empty.
+        
+        Throttling here keeps bursts of moderator commands from running into
+        Discord's rate limits and discord.py's retry-after sleeps.
+        
+        Args:
+            route: Key into _RATE_LIMITS
+            guild_id: Guild the request is made in
+        """
+        rate, per = _RATE_LIMITS[route]
+        key = (route, guild_id)
+        now = time.monotonic()
+        
+        tokens, last_refill = self._buckets.get(key, (rate, now))
+        # Refill, then take a token; a negative balance is the wait owed by this caller
+        tokens = min(rate, tokens + (now - last_refill) * rate / per) - 1
+        self._buckets[key] = (tokens, now)
+        
+        if tokens < 0:
+            await asyncio.sleep(-tokens * per / rate)
+            
+    async def _send_dm(self, user, embed):
+        """
+        DM a user about a moderation action.
+        
+        Bots and users who refused a DM in the last DM_BLOCKED_TTL seconds are
+        skipped without a request.
+        
+        Returns:
+            bool: Whether the DM was delivered
+        """
+        if user.bot or self._dm_recently_refused(user.id):
+            return False
+            
+        try:
+            return await self._deliver_dm(user, embed)
+        except discord.Forbidden:
+            self._remember_dm_refusal(user.id)
+            return False
+            
+    async def _deliver_dm(self, user, embed):
+        """Send a DM, logging failures other than a refusal, which is raised as discord.Forbidden."""
+        try:
+            async with asyncio.timeout(API_TIMEOUT):
+                await user.send(embed=embed)
+            return True
+        except discord.Forbidden:
+            raise
+        except (discord.HTTPException, TimeoutError) as e:
+            logger.warning(f"Failed to DM user {user.id}: {e}")
+        return False
+        
+    def _remember_dm_refusal(self, user_id):
+        """Skip DMs to a user who refused one for a while, forgetting the oldest past DM_BLOCKED_MAX."""
+        # Re-insert so the dict stays ordered by refusal time
+        self._dm_blocked.pop(user_id, None)
+        if len(self._dm_blocked) >= DM_BLOCKED_MAX:
+            del self._dm_blocked[next(iter(self._dm_blocked))]
+        self._dm_blocked[user_id] = time.monotonic()
+        
+    def _dm_recently_refused(self, user_id):
+        """Whether a user refused a DM within DM_BLOCKED_TTL seconds, dropping older refusals."""
+        refused_at = self._dm_blocked.get(user_id)
+        if refused_at is None:
+            return False
+        if time.monotonic() - refused_at < DM_BLOCKED_TTL:
+            return True
+        del self._dm_blocked[user_id]
+        return False
+        
+    async def _dm_before_action(self, user, embed):
+        """
+        DM a user ahead of an action that removes them from the server.
+        
+        The DM has to go out first, but a slow DM only holds the action up for
+        DM_WAIT seconds; after that it finishes in the background.
+        """
+        if user.bot or self._dm_recently_refused(user.id):
+            return
+            
+        task = self._loop.create_task(self._deliver_dm(user, embed))
+        done, _ = await asyncio.wait({task}, timeout=DM_WAIT)
+        if done:
+            self._finish_dm(task, user.id)
+        else:
+            # A refusal arriving after the action only means the user no longer shares
+            # a server with the bot, so it isn't remembered
+            self._dm_tasks.add(task)
+            task.add_done_callback(self._finish_late_dm)
+            
+    def _finish_dm(self, task, user_id=None):
+        """Collect the outcome of a DM task, remembering a refusal if user_id is given."""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if isinstance(error, discord.Forbidden):
+            if user_id is not None:
+                self._remember_dm_refusal(user_id)
+        elif error:
+            logger.error("Unexpected error sending a DM: %s", error, exc_info=error)
+            
+    def _finish_late_dm(self, task):
+        """Done callback for DMs that outlasted DM_WAIT."""
+        self._dm_tasks.discard(task)
+        self._finish_dm(task)
+        
+    def _action_body(self, user, reason, moderator, **extras):
+        """
+        Build the body of a moderation response embed.
+        
+        Args:
+            user: User the action was taken on
+            reason: Reason for the action
+            moderator: Moderator who took the action
+            **extras: Additional "label=value" lines, shown after the reason
+            
+        Returns:
+            str: Embed description
+        """
+        return self._join_body(f"**User:** {user} ({user.id})", reason, moderator, extras)
+        
+    def _dm_body(self, guild, reason, moderator, **extras):
+        """Build the body of a DM notifying a user of a moderation action."""
+        return self._join_body(f"**Server:** {guild.name}", reason, moderator, extras)
+        
+    @staticmethod
+    def _join_body(first_line, reason, moderator, extras):
+        """Join embed body lines with the moderator line last."""
+        parts = [first_line, f"**Reason:** {reason}"]
+        parts.extend(f"**{label}:** {value}" for label, value in extras.items())
+        parts.append(f"**Moderator:** {moderator}")
+        return "\n".join(parts)
+        
+    def _parse_duration(self, duration_str, max_seconds=MAX_DURATION):
+        """Parse duration string like '1h', '30m', '7d' into a UNIX timestamp that far from now, or None past max_seconds."""
         if not duration_str:
             return None
             
-        match = re.match(r'^(\d+)([smhd])$', duration_str.lower())
-        if not match:
+        amount, unit = duration_str[:-1], duration_str[-1:].lower()
+        multiplier = _DURATION_SECONDS.get(unit)
+        if multiplier is None or not amount.isdecimal():
             return None
             
-        amount, unit = match.groups()
-        amount = int(amount)
+        seconds = int(amount) * multiplier
+        if seconds > max_seconds:
+            return None
+            
+        return time.time() + seconds
+        
         
-        now = datetime.now(timezone.utc)
+    def _load_unbans(self):
+        """Load scheduled unbans saved by a previous run."""
+        try:
+            with open(config.UNBAN_STORE_PATH) as f:
+                self._unban_at = {(guild_id, user_id): unban_time for unban_time, guild_id, user_id in json.load(f)}
+        except FileNotFoundError:
+            self._unban_at = {}
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Failed to load scheduled unbans: {e}")
+            self._unban_at = {}
+            
+        self._pending_unbans = [(unban_time, guild_id, user_id) for (guild_id, user_id), unban_time in self._unban_at.items()]
+        heapq.heapify(self._pending_unbans)
+            
+    def _save_unbans(self):
+        """Persist scheduled unbans so they survive a restart."""
+        try:
+            store_dir = os.path.dirname(config.UNBAN_STORE_PATH)
+            if store_dir and not os.path.exists(store_dir):
+                os.makedirs(store_dir)
+                
+            # Write a temporary file and swap it in, so a crash mid-write keeps the old store
+            tmp_path = f"{config.UNBAN_STORE_PATH}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump([[unban_time, guild_id, user_id] for (guild_id, user_id), unban_time in self._unban_at.items()], f)
+            os.replace(tmp_path, config.UNBAN_STORE_PATH)
+        except OSError as e:
+            logger.error(f"Failed to save scheduled unbans: {e}")
+            
+    def _schedule_unban(self, guild_id, user_id, unban_time):
+        """
+        Schedule automatic unban at a UNIX timestamp, replacing any unban already scheduled.
         
-        if unit == 's':
-            return now + timedelta(seconds=amount)
-        elif unit == 'm':
-            return now + timedelta(minutes=amount)
-        elif unit == 'h':
-            return now + timedelta(hours=amount)
-        elif unit == 'd':
-            return now + timedelta(days=amount)
+        An unban_time of None cancels the scheduled unban instead.
+        """
+        key = (guild_id, user_id)
+        self._unban_retries.pop(key, None)
+        if unban_time is None:
+            if self._unban_at.pop(key, None) is None:
+                return
+        else:
+            self._unban_at[key] = unban_time
+            heapq.heappush(self._pending_unbans, (unban_time, guild_id, user_id))
             
-        return None
+        self._save_unbans()
+        self._wakeup.set()
         
+    def _retry_unban(self, guild_id, user_id, error):
+        """Reschedule a failed automatic unban, backing off exponentially."""
+        key = (guild_id, user_id)
+        attempt = self._unban_retries.get(key, 0)
+        delay = min(UNBAN_RETRY_MAX, UNBAN_RETRY_DELAY * 2 ** attempt)
+        logger.error(f"Failed automatic unban of {user_id} in guild {guild_id}, retrying in {delay}s: {error}")
+        self._schedule_unban(guild_id, user_id, time.time() + delay)
+        self._unban_retries[key] = attempt + 1
         
-    async def _schedule_unban(self, guild, user, unban_time):
-        """Schedule automatic unban."""
-        await asyncio.sleep((unban_time - datetime.now(timezone.utc)).total_seconds())
-        try:
-            await guild.unban(user, reason="Automatic unban - ban duration expired")
-        except Exception as e:
-            pass
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        """Forget scheduled unbans in a guild the bot has left."""
+        keys = [key for key in self._unban_at if key[0] == guild.id]
+        for key in keys:
+            del self._unban_at[key]
+            self._unban_retries.pop(key, None)
+        if keys:
+            self._save_unbans()
+            
+    def _evict_expired_mutes(self):
+        """Drop mute records whose timeout has run out."""
+        now = time.time()
+        while self._mute_heap and self._mute_heap[0][0] <= now:
+            expiry, user_id = heapq.heappop(self._mute_heap)
+            info = self.muted_users.get(user_id)
+            # Skip if the user was re-muted since this entry was pushed
+            if info and info.until == expiry:
+                del self.muted_users[user_id]
+                
+    async def _unban_worker(self):
+        """Single background task that lifts timed bans and expires mute records."""
+        await self.bot.wait_until_ready()
+        
+        while True:
+            self._wakeup.clear()
+            self._evict_expired_mutes()
+            
+            due = [heap[0][0] for heap in (self._pending_unbans, self._mute_heap) if heap]
+            if not due:
+                await self._wakeup.wait()
+                continue
+                
+            # Sleep until the earliest unban or mute expiry is due, or something new is scheduled
+            delay = min(due) - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+                
+            if not self._pending_unbans or self._pending_unbans[0][0] > time.time():
+                continue
+                
+            unban_time, guild_id, user_id = heapq.heappop(self._pending_unbans)
+            key = (guild_id, user_id)
+            # Skip entries cancelled or rescheduled since they were pushed
+            if self._unban_at.get(key) != unban_time:
+                continue
+                
+            # The entry stays stored until the unban is done, so a transient failure retries instead of dropping it
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                # Once ready, a missing guild is one the bot is no longer in
+                logger.warning(f"Dropping scheduled unban of {user_id}: bot is no longer in guild {guild_id}")
+            elif guild.unavailable:
+                # Discord outage; the guild comes back on its own
+                self._retry_unban(guild_id, user_id, f"guild {guild_id} unavailable")
+                continue
+            else:
+                try:
+                    async with asyncio.timeout(API_TIMEOUT):
+                        await guild.unban(discord.Object(id=user_id), reason="Automatic unban - ban duration expired")
+                    logger.info(f"Automatically unbanned {user_id} in guild {guild_id}")
+                except discord.NotFound:
+                    pass  # Already unbanned
+                except discord.Forbidden as e:
+                    # Retrying won't help until someone restores the bot's Ban Members permission
+                    logger.error(f"Dropping scheduled unban of {user_id} in guild {guild_id}: {e}")
+                except Exception as e:
+                    # Timeouts, 5xx and connection errors that discord.py doesn't wrap
+                    self._retry_unban(guild_id, user_id, str(e) or type(e).__name__)
+                    continue
+                
+            # Leave it alone if a new ban rescheduled it while the request was in flight
+            if self._unban_at.get(key) == unban_time:
+                self._schedule_unban(guild_id, user_id, None)
 
     @app_commands.command(name="ban", description="Ban a user with optional reason and duration")
     @app_commands.describe(
-        member="The member to ban",
+        member="The user to ban (does not need to be in the server)",
         duration="Duration of the ban (e.g., 1h, 30m, 7d)",
         reason="Reason for the ban"
     )
-    async def ban_user(self, interaction: discord.Interaction, member: discord.Member, duration: str = None, reason: str = "No reason provided"):
+    async def ban_user(self, interaction: discord.Interaction, member: discord.User, duration: str = None, reason: str = "No reason provided"):
         """Advanced ban slash command with duration support."""
         # Check permissions
-        if not interaction.user.guild_permissions.ban_members:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to ban members."))
+        if not interaction.user.guild_permissions.value & _BAN_MEMBERS:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['ban']))
             return
             
         try:
@@ -91,39 +467,46 @@ class ModerationCommands(BaseCommand):
             if duration:
                 ban_until = self._parse_duration(duration)
                 if not ban_until:
-                    await self.send_embed(interaction, self.create_error_embed("Invalid Duration", "Please use format like '1h', '30m', '7d'"))
+                    await self.send_embed(interaction, self.create_error_embed("Invalid Duration", "Please use format like '1h', '30m', '7d' (at most 365 days)"))
                     return
                     
-            # Send DM to user before ban
-            try:
+            # Defer the response; the DM wait and the ban can outlast Discord's 3 second window
+            await interaction.response.defer()
+            
+            # Send DM to user before ban; it can't be delivered once they no longer share the server
+            if isinstance(member, discord.Member):
                 dm_embed = self.create_error_embed(
                     "You have been banned",
-                    f"**Server:** {interaction.guild.name}\n**Reason:** {reason}\n**Duration:** {duration or 'Permanent'}\n**Moderator:** {interaction.user}"
+                    self._dm_body(interaction.guild, reason, interaction.user, Duration=duration or 'Permanent')
                 )
-                await member.send(embed=dm_embed)
-            except:
-                pass  # User has DMs disabled
+                await self._dm_before_action(member, dm_embed)
                 
-            # Ban the user
-            await member.ban(reason=f"Banned by {interaction.user}: {reason}")
+            # Every ban replaces the previous one, so drop or replace any scheduled unban.
+            # Done before the request: a timeout can't tell a ban that was never applied
+            # from one applied late, and a late ban must still be lifted on time.
+            previous_unban = self._unban_at.get((interaction.guild.id, member.id))
+            self._schedule_unban(interaction.guild.id, member.id, ban_until)
             
+            # Ban by ID so users who already left the server can be banned too
+            try:
+                async with asyncio.timeout(API_TIMEOUT):
+                    await interaction.guild.ban(discord.Object(id=member.id), reason=f"Banned by {interaction.user}: {reason}")
+            except discord.HTTPException:
+                # Discord refused the ban, so the earlier schedule still applies unless another ban replaced it meanwhile
+                if self._unban_at.get((interaction.guild.id, member.id)) == ban_until:
+                    self._schedule_unban(interaction.guild.id, member.id, previous_unban)
+                raise
+                
             # Log the ban
             log_embed = self.create_success_embed(
                 "User Banned Successfully",
-                f"**User:** {member} ({member.id})\n**Reason:** {reason}\n**Duration:** {duration or 'Permanent'}\n**Moderator:** {interaction.user}"
+                self._action_body(member, reason, interaction.user, Duration=duration or 'Permanent')
             )
             log_embed.set_thumbnail(url=member.display_avatar.url)
             await self.send_embed(interaction, log_embed)
             
-            # Schedule unban if duration specified
-            if ban_until:
-                asyncio.create_task(self._schedule_unban(interaction.guild, member, ban_until))
-                
-                
         except discord.Forbidden:
             await self.send_embed(interaction, self.create_error_embed("Permission Error", "I don't have permission to ban this user."))
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while banning the user."))
 
     @app_commands.command(name="unban", description="Unban a user by ID")
     @app_commands.describe(
@@ -132,27 +515,32 @@ class ModerationCommands(BaseCommand):
     )
     async def unban_user(self, interaction: discord.Interaction, user_id: str, reason: str = "No reason provided"):
         """Unban a user by their ID."""
-        if not interaction.user.guild_permissions.ban_members:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to unban members."))
+        if not interaction.user.guild_permissions.value & _BAN_MEMBERS:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['unban']))
             return
             
         try:
             user_id_int = int(user_id)
-            user = await self.bot.fetch_user(user_id_int)
-            await interaction.guild.unban(user, reason=f"Unbanned by {interaction.user}: {reason}")
+            # Unban by ID; fetching the user first would cost an extra API call
+            async with asyncio.timeout(API_TIMEOUT):
+                await interaction.guild.unban(discord.Object(id=user_id_int), reason=f"Unbanned by {interaction.user}: {reason}")
+            self._schedule_unban(interaction.guild.id, user_id_int, None)
             
-            embed = self.create_success_embed(
-                "User Unbanned",
-                f"**User:** {user} ({user.id})\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
-            )
+            # Name the user only if they're already cached
+            user = self.bot.get_user(user_id_int)
+            if user:
+                body = self._action_body(user, reason, interaction.user)
+            else:
+                body = self._join_body(f"**User ID:** {user_id_int}", reason, interaction.user, {})
+            embed = self.create_success_embed("User Unbanned", body)
             await self.send_embed(interaction, embed)
             
         except ValueError:
             await self.send_embed(interaction, self.create_error_embed("Error", "Invalid user ID format."))
         except discord.NotFound:
+            # Not banned any more, so a scheduled unban has nothing left to do
+            self._schedule_unban(interaction.guild.id, user_id_int, None)
             await self.send_embed(interaction, self.create_error_embed("Error", "User not found or not banned."))
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while unbanning the user."))
 
     @app_commands.command(name="kick", description="Kick a user with reason")
     @app_commands.describe(
@@ -161,34 +549,33 @@ class ModerationCommands(BaseCommand):
     )
     async def kick_user(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
         """Kick a user from the server."""
-        if not interaction.user.guild_permissions.kick_members:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to kick members."))
+        if not interaction.user.guild_permissions.value & _KICK_MEMBERS:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['kick']))
             return
             
         try:
-            # Send DM before kick
-            try:
-                dm_embed = self.create_warning_embed(
-                    "You have been kicked",
-                    f"**Server:** {interaction.guild.name}\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
-                )
-                await member.send(embed=dm_embed)
-            except:
-                pass
+            # Defer the response; the DM wait and the kick can outlast Discord's 3 second window
+            await interaction.response.defer()
+            
+            # Send DM before kick; it can't be delivered once they no longer share the server
+            dm_embed = self.create_warning_embed(
+                "You have been kicked",
+                self._dm_body(interaction.guild, reason, interaction.user)
+            )
+            await self._dm_before_action(member, dm_embed)
                 
-            await member.kick(reason=f"Kicked by {interaction.user}: {reason}")
+            async with asyncio.timeout(API_TIMEOUT):
+                await member.kick(reason=f"Kicked by {interaction.user}: {reason}")
             
             embed = self.create_success_embed(
                 "User Kicked",
-                f"**User:** {member} ({member.id})\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
+                self._action_body(member, reason, interaction.user)
             )
             embed.set_thumbnail(url=member.display_avatar.url)
             await self.send_embed(interaction, embed)
             
         except discord.Forbidden:
             await self.send_embed(interaction, self.create_error_embed("Permission Error", "I don't have permission to kick this user."))
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while kicking the user."))
 
     @app_commands.command(name="mute", description="Mute a user for specified duration")
     @app_commands.describe(
@@ -198,36 +585,43 @@ class ModerationCommands(BaseCommand):
     )
     async def mute_user(self, interaction: discord.Interaction, member: discord.Member, duration: str = "10m", reason: str = "No reason provided"):
         """Advanced mute slash command with duration."""
-        if not interaction.user.guild_permissions.moderate_members:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to moderate members."))
+        if not interaction.user.guild_permissions.value & _MODERATE_MEMBERS:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['mute']))
             return
             
+        # Parse duration
+        mute_until = self._parse_duration(duration, MUTE_MAX_DURATION)
+        if not mute_until:
+            await self.send_embed(interaction, self.create_error_embed("Invalid Duration", "Please use format like '10m', '1h', '1d' (at most 28 days)"))
+            return
+        timeout_until = datetime.fromtimestamp(mute_until, _UTC)
+        
+        # Store mute info before the request, so a timeout applied late is still recorded
+        self._evict_expired_mutes()
+        previous_mute = self.muted_users.get(member.id)
+        mute_info = self.muted_users[member.id] = MuteInfo(mute_until, reason, interaction.user.id)
+        heapq.heappush(self._mute_heap, (mute_until, member.id))
+        self._wakeup.set()
+        
+        # Apply timeout
         try:
-            # Parse duration
-            mute_until = self._parse_duration(duration)
-            if not mute_until:
-                await self.send_embed(interaction, self.create_error_embed("Invalid Duration", "Please use format like '10m', '1h', '1d'"))
-                return
-            
-            # Apply timeout
-            await member.timeout(mute_until, reason=f"Muted by {interaction.user}: {reason}")
-            
-            # Store mute info
-            self.muted_users[member.id] = {
-                'until': mute_until,
-                'reason': reason,
-                'moderator': interaction.user.id
-            }
-            
-            embed = self.create_success_embed(
-                "User Muted",
-                f"**User:** {member} ({member.id})\n**Duration:** {duration}\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
-            )
-            embed.set_thumbnail(url=member.display_avatar.url)
-            await self.send_embed(interaction, embed)
+            async with asyncio.timeout(API_TIMEOUT):
+                await member.timeout(timeout_until, reason=f"Muted by {interaction.user}: {reason}")
+        except discord.HTTPException:
+            # Discord refused the timeout; the heap entry pushed above no longer matches and is skipped
+            if self.muted_users.get(member.id) is mute_info:
+                if previous_mute:
+                    self.muted_users[member.id] = previous_mute
+                else:
+                    del self.muted_users[member.id]
+            raise
             
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while muting the user."))
+        embed = self.create_success_embed(
+            "User Muted",
+            self._action_body(member, reason, interaction.user, Duration=duration)
+        )
+        embed.set_thumbnail(url=member.display_avatar.url)
+        await self.send_embed(interaction, embed)
 
     @app_commands.command(name="unmute", description="Unmute a user")
     @app_commands.describe(
@@ -236,24 +630,21 @@ class ModerationCommands(BaseCommand):
     )
     async def unmute_user(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
         """Unmute a user."""
-        if not interaction.user.guild_permissions.moderate_members:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to moderate members."))
+        if not interaction.user.guild_permissions.value & _MODERATE_MEMBERS:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['unmute']))
             return
             
-        try:
+        async with asyncio.timeout(API_TIMEOUT):
             await member.timeout(None, reason=f"Unmuted by {interaction.user}: {reason}")
+        
+        self.muted_users.pop(member.id, None)
+        self._evict_expired_mutes()
             
-            if member.id in self.muted_users:
-                del self.muted_users[member.id]
-                
-            embed = self.create_success_embed(
-                "User Unmuted",
-                f"**User:** {member} ({member.id})\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
-            )
-            await self.send_embed(interaction, embed)
-            
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while unmuting the user."))
+        embed = self.create_success_embed(
+            "User Unmuted",
+            self._action_body(member, reason, interaction.user)
+        )
+        await self.send_embed(interaction, embed)
 
     @app_commands.command(name="warn", description="Warn a user and log the warning")
     @app_commands.describe(
@@ -262,30 +653,26 @@ class ModerationCommands(BaseCommand):
     )
     async def warn_user(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
         """Warn a user and log it."""
-        if not interaction.user.guild_permissions.manage_messages:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to warn members."))
+        if not interaction.user.guild_permissions.value & _MANAGE_MESSAGES:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['warn']))
             return
             
-        try:
-            # Send DM warning
-            try:
-                dm_embed = self.create_warning_embed(
-                    "You received a warning",
-                    f"**Server:** {interaction.guild.name}\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
-                )
-                await member.send(embed=dm_embed)
-            except:
-                pass
-                
-            embed = self.create_warning_embed(
-                "User Warned",
-                f"**User:** {member} ({member.id})\n**Reason:** {reason}\n**Moderator:** {interaction.user}"
+        dm_embed = self.create_warning_embed(
+            "You received a warning",
+            self._dm_body(interaction.guild, reason, interaction.user)
+        )
+        embed = self.create_warning_embed(
+            "User Warned",
+            self._action_body(member, reason, interaction.user)
+        )
+        embed.set_thumbnail(url=member.display_avatar.url)
+        
+        # Send the DM warning and the response together
+        async with asyncio.timeout(API_TIMEOUT):
+            await asyncio.gather(
+                self._send_dm(member, dm_embed),
+                self.send_embed(interaction, embed)
             )
-            embed.set_thumbnail(url=member.display_avatar.url)
-            await self.send_embed(interaction, embed)
-            
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while warning the user."))
 
     @app_commands.command(name="clear", description="Delete multiple messages")
     @app_commands.describe(
@@ -294,58 +681,58 @@ class ModerationCommands(BaseCommand):
     )
     async def clear_messages(self, interaction: discord.Interaction, amount: int = 10, member: discord.Member = None):
         """Delete multiple messages with optional user filter."""
-        if not interaction.user.guild_permissions.manage_messages:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to manage messages."))
+        if not interaction.user.guild_permissions.value & _MANAGE_MESSAGES:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['clear']))
             return
             
-        try:
-            if amount > 100:
-                amount = 100
-                
-            def check(message):
-                if member:
-                    return message.author == member
-                return True
-                
-            # Defer the response since this might take a while
-            await interaction.response.defer()
-            
-            deleted = await interaction.channel.purge(limit=amount, check=check)
-            
-            embed = self.create_success_embed(
-                "Messages Cleared",
-                f"**Deleted:** {len(deleted)} messages\n**Channel:** {interaction.channel.mention}\n**Moderator:** {interaction.user}"
-            )
-            
-            if member:
-                embed.add_field(name="Filter", value=f"Only messages from {member}", inline=False)
-                
-            await interaction.followup.send(embed=embed, delete_after=5)
+        if amount > 100:
+            amount = 100
             
+        # Defer the response since this might take a while
+        await interaction.response.defer()
+        
+        await self._take('purge', interaction.guild.id)
+        # Only scan messages sent before the command, which also keeps the deferred response out of the purge
+        before = interaction.created_at
+        async with asyncio.timeout(PURGE_TIMEOUT):
+            if member is None:
+                # No filter: let purge bulk-delete without a per-message check
+                deleted = await interaction.channel.purge(limit=amount, before=before)
+            else:
+                member_id = member.id
+                deleted = await interaction.channel.purge(limit=amount, before=before, check=lambda message: message.author.id == member_id)
+        
+        embed = self.create_success_embed(
+            "Messages Cleared",
+            f"**Deleted:** {len(deleted)} messages\n**Channel:** {interaction.channel.mention}\n**Moderator:** {interaction.user}"
+        )
+        
+        if member:
+            embed.add_field(name="Filter", value=f"Only messages from {member}", inline=False)
             
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while clearing messages."))
+        await interaction.followup.send(embed=embed, delete_after=5)
 
     @app_commands.command(name="slowmode", description="Set channel slowmode delay")
     @app_commands.describe(delay="Slowmode delay in seconds (0 to disable)")
     async def set_slowmode(self, interaction: discord.Interaction, delay: int = 0):
         """Set slowmode for the current channel."""
-        if not interaction.user.guild_permissions.manage_channels:
-            await self.send_embed(interaction, self.create_error_embed("Permission Denied", "You don't have permission to manage channels."))
+        if not interaction.user.guild_permissions.value & _MANAGE_CHANNELS:
+            await self.send_embed(interaction, self.create_error_embed(*_ERR_DENIED['slowmode']))
             return
             
-        try:
+        # Defer first; waiting on the rate limit bucket can outlast Discord's 3 second window
+        await interaction.response.defer()
+        
+        await self._take('channel_edit', interaction.guild.id)
+        async with asyncio.timeout(API_TIMEOUT):
             await interaction.channel.edit(slowmode_delay=delay)
+        
+        if delay == 0:
+            embed = self.create_success_embed("Slowmode Disabled", f"Slowmode has been disabled in {interaction.channel.mention}")
+        else:
+            embed = self.create_success_embed("Slowmode Set", f"Slowmode set to **{delay} seconds** in {interaction.channel.mention}")
             
-            if delay == 0:
-                embed = self.create_success_embed("Slowmode Disabled", f"Slowmode has been disabled in {interaction.channel.mention}")
-            else:
-                embed = self.create_success_embed("Slowmode Set", f"Slowmode set to **{delay} seconds** in {interaction.channel.mention}")
-                
-            await self.send_embed(interaction, embed)
-            
-        except Exception as e:
-            await self.send_embed(interaction, self.create_error_embed("Error", "An error occurred while setting slowmode."))
+        await self.send_embed(interaction, embed)
 
 async def setup(bot):
     """Setup function for the cog."""
@@ -6,11 +6,16 @@ Handles message reporting via emoji reactions with decorative embeds
 
 import discord
 from discord.ext import commands
+import asyncio
+import time
 from .base_command import BaseCommand
 from utils.logger import setup_logger
 
 logger = setup_logger('reaction_reporting')
 
+# Further reports of the same message within this many seconds are not re-sent
+REPORT_COOLDOWN = 60
+
 class ReactionReporting(BaseCommand):
     """Reaction-based message reporting system."""
     
@@ -18,41 +23,61 @@ class ReactionReporting(BaseCommand):
         super().__init__(bot)
         self.report_emoji_id = 1406321078086668419  # The custom emoji ID for reporting
         self.report_channel_id = 1410841913111875675  # Channel to send reports to
+        self._report_channel = None  # Resolved on first report
+        self._recent_reports = {}  # message_id -> monotonic time of its last sent report
+        self._removal_tasks = set()  # Pending reaction removals
         
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
         """Handle reaction additions for message reporting."""
+        # Ignore bot reactions
+        if user.bot:
+            return
+            
+        # Check if it's the report emoji; unicode emojis are plain strings with no id
+        if getattr(reaction.emoji, 'id', None) == self.report_emoji_id:
+            await self._handle_message_report(reaction, user)
+            
+    async def _remove_reaction_later(self, reaction, user):
+        """Remove a report reaction after a few seconds."""
+        await asyncio.sleep(2)
         try:
-            # Ignore bot reactions
-            if user.bot:
-                return
-                
-            # Check if it's the report emoji
-            if hasattr(reaction.emoji, 'id') and reaction.emoji.id == self.report_emoji_id:
-                await self._handle_message_report(reaction, user)
-                
-        except Exception as e:
-            logger.error(f"Error in reaction reporting: {e}")
+            await reaction.remove(user)
+        except discord.HTTPException:
+            pass  # Ignore if we can't remove the reaction
             
     async def _handle_message_report(self, reaction, reporter):
         """Handle a message report via reaction."""
+        message = reaction.message
+        reported_at = None  # Set once this report holds the message's cooldown slot
         try:
-            message = reaction.message
             guild = message.guild
             
-            # Remove the reaction after a few seconds
-            await asyncio.sleep(2)
-            try:
-                await reaction.remove(reporter)
-            except:
-                pass  # Ignore if we can't remove the reaction
+            # Remove the reaction in the background while the report is sent
+            task = asyncio.create_task(self._remove_reaction_later(reaction, reporter))
+            self._removal_tasks.add(task)
+            task.add_done_callback(self._removal_tasks.discard)
                 
             # Get the report channel
-            report_channel = self.bot.get_channel(self.report_channel_id)
+            if self._report_channel is None:
+                self._report_channel = self.bot.get_channel(self.report_channel_id)
+            report_channel = self._report_channel
             if not report_channel:
                 logger.error(f"Report channel {self.report_channel_id} not found")
                 return
                 
+            # Coalesce repeat reports of the same message
+            now = time.monotonic()
+            expired = [key for key, reported_at in self._recent_reports.items() if now - reported_at > REPORT_COOLDOWN]
+            for key in expired:
+                del self._recent_reports[key]
+                
+            if message.id in self._recent_reports:
+                logger.info(f"Skipping duplicate report of message {message.id} by {reporter.id}")
+                return
+            # Claimed before sending so concurrent reports coalesce; released again if the send fails
+            self._recent_reports[message.id] = reported_at = now
+            
             # Create decorative report embed
             embed = discord.Embed(
                 title="🚨 Message Report",
@@ -96,13 +121,12 @@ class ReactionReporting(BaseCommand):
             
             # Add attachment info if any
             if message.attachments:
-                attachment_info = []
-                for attachment in message.attachments:
-                    attachment_info.append(f"• {attachment.filename} ({attachment.size} bytes)")
+                # Limit to 5 attachments
+                attachment_info = [f"• {attachment.filename} ({attachment.size} bytes)" for attachment in message.attachments[:5]]
                     
                 embed.add_field(
                     name="📎 Attachments",
-                    value="\n".join(attachment_info[:5]),  # Limit to 5 attachments
+                    value="\n".join(attachment_info),
                     inline=False
                 )
                 
@@ -125,8 +149,9 @@ class ReactionReporting(BaseCommand):
             embed.set_thumbnail(url=reported_user.display_avatar.url)
             
             # Add footer with additional info
+            sent_at = message.created_at.replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
             embed.set_footer(
-                text=f"Report submitted • Message sent {message.created_at.strftime('%Y-%m-%d %H:%M:%S')} UTC",
+                text=f"Report submitted • Message sent {sent_at} UTC",
                 icon_url=reporter.display_avatar.url
             )
             
@@ -138,23 +163,17 @@ class ReactionReporting(BaseCommand):
                     inline=False
                 )
                 
-            # Send the report
-            await report_channel.send(embed=embed)
-            
-            # Add action buttons for moderators
+            # Send the report with action buttons for moderators
             view = ReportActionView(message, reported_user, reporter)
-            action_embed = discord.Embed(
-                title="🔧 Moderator Actions",
-                description="Choose an action to take on this report:",
-                color=discord.Color.blue()
-            )
-            
-            await report_channel.send(embed=action_embed, view=view)
+            await report_channel.send(embed=embed, view=view)
             
             logger.info(f"Message report sent - Reporter: {reporter.id}, Reported: {reported_user.id}, Message: {message.id}")
             
         except Exception as e:
             logger.error(f"Error handling message report: {e}")
+            # Nothing reached moderators, so don't hold back the next report of this message
+            if reported_at is not None and self._recent_reports.get(message.id) == reported_at:
+                del self._recent_reports[message.id]
 
 
 class ReportActionView(discord.ui.View):
@@ -246,9 +265,6 @@ class ReportActionView(discord.ui.View):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
-# Import asyncio for the sleep function
-import asyncio
-
 async def setup(bot):
     """Setup function to add the reaction reporting system to the bot."""
     await bot.add_cog(ReactionReporting(bot))
\ No newline at end of file
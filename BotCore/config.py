@@ -14,39 +14,43 @@ class BotConfig:
     
     def __init__(self):
         """Initialize configuration with environment variables and defaults."""
+        getenv = os.environ.get
         
         # Discord Bot Settings
-        self.DISCORD_TOKEN = os.getenv('DISCORD_TOKEN', '')
-        self.PREFIX = os.getenv('BOT_PREFIX', '!')
-        self.OWNER_ID = int(os.getenv('OWNER_ID', '0')) if os.getenv('OWNER_ID') else None
+        self.DISCORD_TOKEN = getenv('DISCORD_TOKEN', '')
+        self.PREFIX = getenv('BOT_PREFIX', '!')
+        self.OWNER_ID = int(owner_id) if (owner_id := getenv('OWNER_ID')) else None
         
         # Bot Behavior Settings
-        self.MAX_MESSAGE_LENGTH = int(os.getenv('MAX_MESSAGE_LENGTH', '2000'))
-        self.COMMAND_COOLDOWN = float(os.getenv('COMMAND_COOLDOWN', '1.0'))
-        self.ERROR_CHANNEL_ID = int(os.getenv('ERROR_CHANNEL_ID', '0')) if os.getenv('ERROR_CHANNEL_ID') else None
+        self.MAX_MESSAGE_LENGTH = int(getenv('MAX_MESSAGE_LENGTH', '2000'))
+        self.COMMAND_COOLDOWN = float(getenv('COMMAND_COOLDOWN', '1.0'))
+        self.ERROR_CHANNEL_ID = int(error_channel_id) if (error_channel_id := getenv('ERROR_CHANNEL_ID')) else None
         
         # Keep-alive Settings
-        self.PING_INTERVAL = int(os.getenv('PING_INTERVAL', '20'))
-        self.STATUS_UPDATE_INTERVAL = int(os.getenv('STATUS_UPDATE_INTERVAL', '30'))
-        self.FLASK_PORT = int(os.getenv('FLASK_PORT', '5000'))
+        self.PING_INTERVAL = int(getenv('PING_INTERVAL', '20'))
+        self.STATUS_UPDATE_INTERVAL = int(getenv('STATUS_UPDATE_INTERVAL', '30'))
+        self.FLASK_PORT = int(getenv('FLASK_PORT', '5000'))
         
         # Logging Settings
-        self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
-        self.LOG_TO_FILE = os.getenv('LOG_TO_FILE', 'false').lower() == 'true'
-        self.LOG_FILE_PATH = os.getenv('LOG_FILE_PATH', 'logs/bot.log')
+        self.LOG_LEVEL = getenv('LOG_LEVEL', 'INFO').upper()
+        self.LOG_TO_FILE = getenv('LOG_TO_FILE', 'false').lower() == 'true'
+        self.LOG_FILE_PATH = getenv('LOG_FILE_PATH', 'logs/bot.log')
         
         # Database Settings (for future use)
-        self.DATABASE_URL = os.getenv('DATABASE_URL', '')
-        self.USE_DATABASE = os.getenv('USE_DATABASE', 'false').lower() == 'true'
+        self.DATABASE_URL = getenv('DATABASE_URL', '')
+        self.USE_DATABASE = getenv('USE_DATABASE', 'false').lower() == 'true'
+        
+        # Moderation Settings
+        self.UNBAN_STORE_PATH = getenv('UNBAN_STORE_PATH', 'data/scheduled_unbans.json')
         
         # Security Settings
-        self.SESSION_SECRET = os.getenv('SESSION_SECRET', 'advanced-discord-bot-secret')
-        self.ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', '*').split(',')
+        self.SESSION_SECRET = getenv('SESSION_SECRET', 'advanced-discord-bot-secret')
+        self.ALLOWED_ORIGINS = getenv('ALLOWED_ORIGINS', '*').split(',')
         
         # Feature Flags
-        self.ENABLE_LOGGING = os.getenv('ENABLE_LOGGING', 'true').lower() == 'true'
-        self.ENABLE_ERROR_REPORTING = os.getenv('ENABLE_ERROR_REPORTING', 'true').lower() == 'true'
-        self.ENABLE_METRICS = os.getenv('ENABLE_METRICS', 'true').lower() == 'true'
+        self.ENABLE_LOGGING = getenv('ENABLE_LOGGING', 'true').lower() == 'true'
+        self.ENABLE_ERROR_REPORTING = getenv('ENABLE_ERROR_REPORTING', 'true').lower() == 'true'
+        self.ENABLE_METRICS = getenv('ENABLE_METRICS', 'true').lower() == 'true'
         
         # Validate required settings
         self._validate_config()
@@ -79,6 +83,7 @@ class BotConfig:
         logger.info(f"  Log Level: {self.LOG_LEVEL}")
         logger.info(f"  Log to File: {self.LOG_TO_FILE}")
         logger.info(f"  Database Enabled: {self.USE_DATABASE}")
+        logger.info(f"  Unban Store: {self.UNBAN_STORE_PATH}")
         logger.info(f"  Logging Enabled: {self.ENABLE_LOGGING}")
         logger.info(f"  Error Reporting Enabled: {self.ENABLE_ERROR_REPORTING}")
         logger.info(f"  Metrics Enabled: {self.ENABLE_METRICS}")
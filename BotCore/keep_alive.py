@@ -6,44 +6,120 @@ Provides web interface for monitoring bot status and handles ping requests.
 
 import os
 import json
+import hashlib
+import time
 from datetime import datetime, timezone
 from flask import Flask, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from utils.logger import setup_logger
 
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None  # Optional: responses are sent uncompressed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Optional: falls back to Flask's standard json provider
+
 # Setup logging
 logger = setup_logger('keep_alive')
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes and decodes with orjson.
+    
+    Output matches DefaultJSONProvider: keys are sorted, and datetimes and dataclasses
+    are passed through to Flask's default() hook instead of orjson's own formats.
+    """
+    
+    # orjson can't escape non-ASCII, so only that differs from the default provider
+    OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+               | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+        
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # Create Flask app
 app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "advanced-discord-bot-secret-key")
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400  # Let browsers keep static assets for a day
+
+# Polled JSON endpoints as path -> (seconds clients may reuse the response, whether to
+# answer with ETag/304); /ping and /health carry a fresh timestamp so an ETag never matches
+CACHEABLE_ROUTES = {'/ping': (5, False), '/health': (5, False), '/api/status': (5, True)}
+
+# Compress the status page and JSON when Flask-Compress is installed
+if Compress:
+    app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json', 'text/css', 'application/javascript']
+    app.config['COMPRESS_LEVEL'] = 6
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app)
+
+# Wall-clock start time kept as a float so requests don't parse the ISO string back
+_started_at = time.time()
 
 # Global bot status storage
 bot_status = {
     'online': False,
-    'last_ping': None,
+    'last_ping': None,  # Unix timestamp of the last status update
     'latency': 0,
     'guilds': 0,
     'users': 0,
     'uptime': 0,
     'stats': {},
-    'start_time': datetime.now(timezone.utc).isoformat()
+    'start_time': datetime.fromtimestamp(_started_at, timezone.utc).isoformat()
 }
 
+# /ping body with only the timestamp and online flag filled in per request; keys are
+# in jsonify's sorted order so the body is exactly what jsonify would produce
+_PING_TEMPLATE = b'{"bot_online":%s,"status":"ok","timestamp":"%s"}\n'
+
+# The rendered status page is reused for this many seconds unless the status changes
+PAGE_CACHE_TTL = 3
+_page_cache = None  # (rendered_at, status_generation, html)
+_status_generation = 0  # Bumped on every status update so stale renders aren't cached
+
+def _serialize_status():
+    """Serialize bot_status once for /api/status, returning (body, etag)."""
+    # Compact separators, as jsonify uses; orjson ignores them and is always compact
+    body = app.json.dumps(bot_status, separators=(",", ":")) + "\n"
+    return body, hashlib.sha1(body.encode()).hexdigest()
+
+_status_cache = _serialize_status()
+
 def update_bot_status(status_data):
     """Update global bot status."""
-    global bot_status
+    global bot_status, _page_cache, _status_generation, _status_cache
     bot_status.update(status_data)
-    bot_status['last_ping'] = datetime.now(timezone.utc).isoformat()
+    _status_generation += 1
+    _page_cache = None
+    bot_status['last_ping'] = time.time()
+    _status_cache = _serialize_status()
     logger.debug(f"Bot status updated: {status_data}")
 
 @app.route('/')
 def status_page():
     """Main status page showing bot health and statistics."""
+    global _page_cache
+    now = time.monotonic()
+    # Read the shared globals once; the bot thread may replace them at any point
+    cached = _page_cache
+    generation = _status_generation
+    if cached and cached[1] == generation and now - cached[0] < PAGE_CACHE_TTL:
+        return cached[2]
+        
     try:
         # Calculate uptime
-        if bot_status.get('last_ping'):
-            last_ping = datetime.fromisoformat(bot_status['last_ping'].replace('Z', '+00:00'))
-            time_since_ping = (datetime.now(timezone.utc) - last_ping).total_seconds()
+        last_ping = bot_status['last_ping']
+        if last_ping is not None:
+            time_since_ping = time.time() - last_ping
             is_online = time_since_ping < 60  # Consider offline if no ping for 60 seconds
         else:
             is_online = False
@@ -56,7 +132,11 @@ def status_page():
             'server_time': datetime.now(timezone.utc).isoformat()
         }
         
-        return render_template('status.html', status=status_info)
+        html = render_template('status.html', status=status_info)
+        # Don't cache a page rendered from status that has changed since
+        if generation == _status_generation:
+            _page_cache = (now, generation, html)
+        return html
         
     except Exception as e:
         logger.error(f"Error rendering status page: {e}")
@@ -65,16 +145,17 @@ def status_page():
 @app.route('/ping')
 def ping():
     """Ping endpoint for external monitoring."""
-    return jsonify({
-        'status': 'ok',
-        'timestamp': datetime.now(timezone.utc).isoformat(),
-        'bot_online': bot_status.get('online', False)
-    })
+    timestamp = datetime.now(timezone.utc).isoformat().encode()
+    online = b'true' if bot_status.get('online', False) else b'false'
+    return app.response_class(_PING_TEMPLATE % (online, timestamp), mimetype='application/json')
 
 @app.route('/api/status')
 def api_status():
     """API endpoint returning detailed bot status."""
-    return jsonify(bot_status)
+    body, etag = _status_cache
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/ping', methods=['POST'])
 def api_ping():
@@ -96,10 +177,25 @@ def health():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now(timezone.utc).isoformat(),
-        'uptime': int((datetime.now(timezone.utc) - 
-                      datetime.fromisoformat(bot_status['start_time'])).total_seconds())
+        'uptime': int(time.time() - _started_at)
     })
 
+@app.after_request
+def add_cache_headers(response):
+    """Add Cache-Control to polled JSON endpoints, plus an ETag and 304s where the body can repeat."""
+    route = CACHEABLE_ROUTES.get(request.path)
+    if route is None or response.status_code != 200:
+        return response
+        
+    max_age, conditional = route
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if not conditional:
+        return response
+        
+    response.add_etag()
+    return response.make_conditional(request)
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
@@ -117,4 +213,4 @@ def internal_error(error):
 
 if __name__ == '__main__':
     logger.info("Starting Flask keep-alive server...")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000)
@@ -10,10 +10,20 @@ import asyncio
 import threading
 import signal
 import time
+from werkzeug.serving import make_server
 from utils.logger import setup_logger
 from bot import AdvancedDiscordBot
+from config import config
 from keep_alive import app as flask_app
 
+try:
+    from waitress import create_server
+except ImportError:
+    create_server = None  # Optional: falls back to Flask's development server
+
+# Longest wait between bot restart attempts, in seconds
+MAX_RESTART_DELAY = 60
+
 # Setup logging
 logger = setup_logger('main')
 
@@ -31,29 +41,44 @@ class BotSystem:
         self.shutdown()
         
     def start_flask_server(self):
-        """Start Flask keep-alive server in a separate thread."""
+        """
+        Bind the Flask keep-alive server and start serving it in a separate thread.
+        
+        The socket is bound before this returns, so the server is reachable as soon
+        as the bot starts.
+        """
         try:
-            logger.info("Starting Flask keep-alive server...")
-            flask_app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+            logger.info(f"Starting Flask keep-alive server ({'waitress' if create_server else 'development server'})...")
+            if create_server:
+                server = create_server(flask_app, host='0.0.0.0', port=config.FLASK_PORT, threads=8)
+                serve_forever = server.run
+            else:
+                server = make_server('0.0.0.0', config.FLASK_PORT, flask_app, threaded=True)
+                serve_forever = server.serve_forever
         except Exception as e:
             logger.error(f"Flask server error: {e}")
+            return
+            
+        self.flask_thread = threading.Thread(target=serve_forever, daemon=True)
+        self.flask_thread.start()
             
     def start_bot(self):
-        """Start the Discord bot."""
-        try:
-            self.bot = AdvancedDiscordBot()
-            logger.info("Starting Discord bot...")
-            self.bot.run_bot()
-        except Exception as e:
-            logger.error(f"Bot startup error: {e}")
-            self.restart_bot()
+        """Start the Discord bot, restarting it with exponential backoff if it fails."""
+        attempt = 0
+        while self.running:
+            try:
+                self.bot = AdvancedDiscordBot()
+                logger.info("Starting Discord bot...")
+                self.bot.run_bot()
+                return
+            except Exception as e:
+                logger.error(f"Bot startup error: {e}")
+                
+            delay = min(MAX_RESTART_DELAY, 2 ** attempt)
+            attempt += 1
+            logger.info(f"Restarting bot in {delay} seconds...")
+            time.sleep(delay)
             
-    def restart_bot(self):
-        """Restart the bot after a delay."""
-        logger.info("Restarting bot in 10 seconds...")
-        time.sleep(10)
-        self.start_bot()
-        
     def run(self):
         """Main run method that starts both Flask and Discord bot."""
         # Setup signal handlers
@@ -64,11 +89,7 @@ class BotSystem:
         logger.info("Starting Advanced Discord Bot System...")
         
         # Start Flask server in separate thread
-        self.flask_thread = threading.Thread(target=self.start_flask_server, daemon=True)
-        self.flask_thread.start()
-        
-        # Give Flask time to start
-        time.sleep(2)
+        self.start_flask_server()
         
         # Start Discord bot (blocking)
         self.start_bot()
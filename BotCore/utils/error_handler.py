@@ -6,19 +6,53 @@ Handles various types of errors and provides appropriate responses.
 
 import discord
 from discord.ext import commands
-import traceback
 import sys
+from functools import lru_cache
+from collections import deque
+import time
+from itertools import count, islice
 from datetime import datetime, timezone
 from utils.logger import setup_logger
 
 logger = setup_logger('error_handler')
 
+# Error IDs are the start time plus a sequence number shared by every ErrorHandler,
+# so IDs stay unique across handlers; next() on a count is atomic
+_BOOT_TS = int(time.time())
+_error_ids = count(1)
+
+@lru_cache(maxsize=64)
+def _pretty_permission(perm):
+    """Turn a permission name like 'manage_messages' into 'Manage Messages'."""
+    return perm.replace('_', ' ').title()
+    
+@lru_cache(maxsize=128)
+def _command_usage(command):
+    """Usage line for a command without the prefix, which varies per message."""
+    return f"{command.qualified_name} {command.signature}"
+
 class ErrorHandler:
     """Advanced error handling for Discord bot commands and events."""
     
     def __init__(self):
         self.error_count = 0
-        self.error_history = []
+        self.error_history = deque(maxlen=100)  # Keeps only the last 100 errors
+        
+        # Error class -> method filling in the reply embed. Forbidden and NotFound
+        # resolve to the HTTPException entry through their MRO.
+        self._embed_builders = {
+            commands.MissingRequiredArgument: self._embed_missing_argument,
+            commands.BadArgument: self._embed_bad_argument,
+            commands.CommandOnCooldown: self._embed_cooldown,
+            commands.MissingPermissions: self._embed_missing_permissions,
+            commands.BotMissingPermissions: self._embed_bot_missing_permissions,
+            commands.NoPrivateMessage: self._embed_guild_only,
+            commands.PrivateMessageOnly: self._embed_dm_only,
+            commands.NotOwner: self._embed_owner_only,
+            commands.DisabledCommand: self._embed_disabled,
+            discord.HTTPException: self._embed_http_error
+        }
+        self._resolved_builders = {}  # Error type -> builder found for it, or None
         
     async def handle_command_error(self, ctx, error):
         """
@@ -29,16 +63,19 @@ class ErrorHandler:
             error: The error that occurred
         """
         self.error_count += 1
-        error_id = f"ERR_{int(datetime.now(timezone.utc).timestamp())}_{self.error_count}"
+        error_id = f"ERR_{_BOOT_TS}_{next(_error_ids)}"
         
-        # Log error details
-        logger.error(f"Command error [{error_id}]: {type(error).__name__}: {str(error)}")
-        logger.error(f"Command: {ctx.command}")
-        logger.error(f"User: {ctx.author} (ID: {ctx.author.id})")
-        logger.error(f"Guild: {ctx.guild.name if ctx.guild else 'DM'} (ID: {ctx.guild.id if ctx.guild else 'N/A'})")
-        logger.error(f"Channel: {ctx.channel} (ID: {ctx.channel.id})")
-        logger.error(f"Message: {ctx.message.content}")
-        logger.error(f"Traceback: {traceback.format_exception(type(error), error, error.__traceback__)}")
+        # Log error details as one record; arguments are only formatted if it is emitted
+        logger.error(
+            "Command error [%s]: %s: %s\nCommand: %s\nUser: %s (ID: %s)\nGuild: %s (ID: %s)\nChannel: %s (ID: %s)\nMessage: %s",
+            error_id, type(error).__name__, error,
+            ctx.command,
+            ctx.author, ctx.author.id,
+            ctx.guild.name if ctx.guild else 'DM', ctx.guild.id if ctx.guild else 'N/A',
+            ctx.channel, ctx.channel.id,
+            ctx.message.content
+        )
+        logger.debug("Traceback [%s]:", error_id, exc_info=error)
         
         # Store error in history
         self.error_history.append({
@@ -52,10 +89,6 @@ class ErrorHandler:
             'channel_id': ctx.channel.id
         })
         
-        # Keep only last 100 errors
-        if len(self.error_history) > 100:
-            self.error_history.pop(0)
-        
         # Handle specific error types
         embed = discord.Embed(color=discord.Color.red())
         embed.set_footer(text=f"Error ID: {error_id}")
@@ -64,74 +97,16 @@ class ErrorHandler:
             # Don't respond to unknown commands
             return
             
-        elif isinstance(error, commands.MissingRequiredArgument):
-            embed.title = "Missing Required Argument"
-            embed.description = f"You're missing the `{error.param.name}` argument."
-            if ctx.command.help:
-                embed.add_field(name="Usage", value=f"`{ctx.prefix}{ctx.command.qualified_name} {ctx.command.signature}`", inline=False)
-                
-        elif isinstance(error, commands.BadArgument):
-            embed.title = "Invalid Argument"
-            embed.description = "One of your arguments is invalid. Please check your input and try again."
-            if ctx.command.help:
-                embed.add_field(name="Usage", value=f"`{ctx.prefix}{ctx.command.qualified_name} {ctx.command.signature}`", inline=False)
-                
-        elif isinstance(error, commands.CommandOnCooldown):
-            embed.title = "Command on Cooldown"
-            embed.description = f"This command is on cooldown. Try again in `{error.retry_after:.1f}` seconds."
-            
-        elif isinstance(error, commands.MissingPermissions):
-            embed.title = "Missing Permissions"
-            perms = ', '.join([perm.replace('_', ' ').title() for perm in error.missing_permissions])
-            embed.description = f"You need the following permissions to use this command: `{perms}`"
-            
-        elif isinstance(error, commands.BotMissingPermissions):
-            embed.title = "Bot Missing Permissions"
-            perms = ', '.join([perm.replace('_', ' ').title() for perm in error.missing_permissions])
-            embed.description = f"I need the following permissions to run this command: `{perms}`"
-            
-        elif isinstance(error, commands.NoPrivateMessage):
-            embed.title = "Guild Only Command"
-            embed.description = "This command can only be used in a server, not in DMs."
-            
-        elif isinstance(error, commands.PrivateMessageOnly):
-            embed.title = "DM Only Command"
-            embed.description = "This command can only be used in DMs, not in a server."
-            
-        elif isinstance(error, commands.NotOwner):
-            embed.title = "Owner Only Command"
-            embed.description = "This command can only be used by the bot owner."
-            
-        elif isinstance(error, commands.DisabledCommand):
-            embed.title = "Command Disabled"
-            embed.description = "This command is currently disabled."
-            
-        elif isinstance(error, discord.HTTPException):
-            embed.title = "Discord API Error"
-            if error.status == 403:
-                embed.description = "I don't have permission to perform this action."
-            elif error.status == 404:
-                embed.description = "The requested resource was not found."
-            elif error.status == 429:
-                embed.description = "I'm being rate limited by Discord. Please try again later."
-            else:
-                embed.description = f"A Discord API error occurred: {error.text}"
-                
-        elif isinstance(error, discord.Forbidden):
-            embed.title = "Permission Denied"
-            embed.description = "I don't have permission to perform this action."
-            
-        elif isinstance(error, discord.NotFound):
-            embed.title = "Not Found"
-            embed.description = "The requested resource was not found."
-            
+        builder = self._get_embed_builder(type(error))
+        if builder:
+            builder(ctx, error, embed)
         else:
             # Generic error
             embed.title = "An Error Occurred"
             embed.description = "An unexpected error occurred while processing your command."
             
             # Log full traceback for debugging
-            logger.error(f"Unhandled error [{error_id}]: {''.join(traceback.format_exception(type(error), error, error.__traceback__))}")
+            logger.error("Unhandled error [%s]: %s: %s", error_id, type(error).__name__, error, exc_info=error)
             
         # Try to send error message
         try:
@@ -144,6 +119,71 @@ class ErrorHandler:
                 # If we can't send anything, log it
                 logger.error(f"Failed to send error message for error {error_id}")
                 
+    def _get_embed_builder(self, error_type):
+        """Find the embed builder for an error type, walking its MRO only the first time."""
+        try:
+            return self._resolved_builders[error_type]
+        except KeyError:
+            builder = next((self._embed_builders[cls] for cls in error_type.__mro__ if cls in self._embed_builders), None)
+            self._resolved_builders[error_type] = builder
+            return builder
+            
+    def _add_usage(self, ctx, embed):
+        """Add the command's usage line to an error embed."""
+        if ctx.command.help:
+            embed.add_field(name="Usage", value=f"`{ctx.prefix}{_command_usage(ctx.command)}`", inline=False)
+            
+    def _embed_missing_argument(self, ctx, error, embed):
+        embed.title = "Missing Required Argument"
+        embed.description = f"You're missing the `{error.param.name}` argument."
+        self._add_usage(ctx, embed)
+        
+    def _embed_bad_argument(self, ctx, error, embed):
+        embed.title = "Invalid Argument"
+        embed.description = "One of your arguments is invalid. Please check your input and try again."
+        self._add_usage(ctx, embed)
+        
+    def _embed_cooldown(self, ctx, error, embed):
+        embed.title = "Command on Cooldown"
+        embed.description = f"This command is on cooldown. Try again in `{error.retry_after:.1f}` seconds."
+        
+    def _embed_missing_permissions(self, ctx, error, embed):
+        embed.title = "Missing Permissions"
+        perms = ', '.join(map(_pretty_permission, error.missing_permissions))
+        embed.description = f"You need the following permissions to use this command: `{perms}`"
+        
+    def _embed_bot_missing_permissions(self, ctx, error, embed):
+        embed.title = "Bot Missing Permissions"
+        perms = ', '.join(map(_pretty_permission, error.missing_permissions))
+        embed.description = f"I need the following permissions to run this command: `{perms}`"
+        
+    def _embed_guild_only(self, ctx, error, embed):
+        embed.title = "Guild Only Command"
+        embed.description = "This command can only be used in a server, not in DMs."
+        
+    def _embed_dm_only(self, ctx, error, embed):
+        embed.title = "DM Only Command"
+        embed.description = "This command can only be used in DMs, not in a server."
+        
+    def _embed_owner_only(self, ctx, error, embed):
+        embed.title = "Owner Only Command"
+        embed.description = "This command can only be used by the bot owner."
+        
+    def _embed_disabled(self, ctx, error, embed):
+        embed.title = "Command Disabled"
+        embed.description = "This command is currently disabled."
+        
+    def _embed_http_error(self, ctx, error, embed):
+        embed.title = "Discord API Error"
+        if error.status == 403:
+            embed.description = "I don't have permission to perform this action."
+        elif error.status == 404:
+            embed.description = "The requested resource was not found."
+        elif error.status == 429:
+            embed.description = "I'm being rate limited by Discord. Please try again later."
+        else:
+            embed.description = f"A Discord API error occurred: {error.text}"
+            
     async def handle_task_error(self, task_name, error):
         """
         Handle errors in background tasks.
@@ -153,10 +193,9 @@ class ErrorHandler:
             error: The error that occurred
         """
         self.error_count += 1
-        error_id = f"TASK_ERR_{int(datetime.now(timezone.utc).timestamp())}_{self.error_count}"
+        error_id = f"TASK_ERR_{_BOOT_TS}_{next(_error_ids)}"
         
-        logger.error(f"Task error [{error_id}] in {task_name}: {type(error).__name__}: {str(error)}")
-        logger.error(f"Traceback: {''.join(traceback.format_exception(type(error), error, error.__traceback__))}")
+        logger.error("Task error [%s] in %s: %s: %s", error_id, task_name, type(error).__name__, error, exc_info=error)
         
         # Store error in history
         self.error_history.append({
@@ -172,18 +211,23 @@ class ErrorHandler:
         
     def get_error_stats(self):
         """Get error statistics."""
-        recent_errors = [e for e in self.error_history 
-                        if (datetime.now(timezone.utc) - e['timestamp']).total_seconds() < 3600]
+        # History is in time order, so stop at the first error older than an hour
+        now = datetime.now(timezone.utc)
+        recent_errors = 0
+        for e in reversed(self.error_history):
+            if (now - e['timestamp']).total_seconds() >= 3600:
+                break
+            recent_errors += 1
         
         return {
             'total_errors': self.error_count,
-            'recent_errors': len(recent_errors),
+            'recent_errors': recent_errors,
             'error_history_count': len(self.error_history)
         }
         
     def get_recent_errors(self, limit=10):
         """Get recent errors for debugging."""
-        return self.error_history[-limit:] if self.error_history else []
+        return list(islice(self.error_history, max(0, len(self.error_history) - limit), None))
 
 # Global error handler instance
 global_error_handler = ErrorHandler()
@@ -5,10 +5,13 @@ Provides structured logging with different levels and output formats.
 """
 
 import logging
+import atexit
 import os
+import queue
 import sys
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import time
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import traceback
 
 class ColoredFormatter(logging.Formatter):
@@ -24,15 +27,30 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
+    def __init__(self, colored=None):
+        super().__init__()
+        # Leave out ANSI codes when output isn't a terminal, e.g. docker or journald logs
+        if colored is None:
+            colored = sys.stdout.isatty()
+        self._colors = self.COLORS if colored else {}
+        self._reset = self.RESET if colored else ''
+        # Records arrive many per second, so the formatted second is reused
+        self._last_sec = None
+        self._last_timestamp = ''
+        
     def format(self, record):
         """Format log record with colors."""
-        log_color = self.COLORS.get(record.levelname, self.RESET)
+        log_color = self._colors.get(record.levelname, self._reset)
         
-        # Format timestamp
-        timestamp = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')
+        # Format timestamp, only once per second
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sec))
+            self._last_sec = sec
+        timestamp = self._last_timestamp
         
         # Format message
-        formatted_message = f"{log_color}[{timestamp}] [{record.levelname:8}] [{record.name:12}] {record.getMessage()}{self.RESET}"
+        formatted_message = f"{log_color}[{timestamp}] [{record.levelname:8}] [{record.name:12}] {record.getMessage()}{self._reset}"
         
         # Add exception info if present
         if record.exc_info:
@@ -49,6 +67,7 @@ class BotLogger:
         self.log_to_file = log_to_file
         self.log_file_path = log_file_path
         self.logger = None
+        self.handlers = []
         
         self._setup_logger()
         
@@ -60,12 +79,12 @@ class BotLogger:
         # Clear existing handlers to avoid duplicates
         self.logger.handlers.clear()
         
-        # Console handler with colors
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(self.level)
-        console_formatter = ColoredFormatter()
-        console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
+        # Records are only queued here; the listener thread does the writing
+        self.logger.addHandler(_get_queue_handler())
+        
+        # Console handler with colors, shared by every logger
+        self.handlers = [_get_console_handler()]
+        _sinks[self.name] = self.handlers
         
         # File handler if enabled
         if self.log_to_file:
@@ -77,26 +96,7 @@ class BotLogger:
     def _setup_file_handler(self):
         """Setup file logging with rotation."""
         try:
-            # Create logs directory if it doesn't exist
-            log_dir = os.path.dirname(self.log_file_path)
-            if log_dir and not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-                
-            # Rotating file handler (10MB max, 5 backup files)
-            file_handler = RotatingFileHandler(
-                self.log_file_path,
-                maxBytes=10*1024*1024,  # 10MB
-                backupCount=5
-            )
-            file_handler.setLevel(self.level)
-            
-            # File formatter (more detailed)
-            file_formatter = logging.Formatter(
-                fmt='%(asctime)s | %(levelname)-8s | %(name)-12s | %(funcName)-15s | %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(file_handler)
+            self.handlers.append(_get_file_handler(self.log_file_path))
             
         except Exception as e:
             self.logger.error(f"Failed to setup file logging: {e}")
@@ -125,6 +125,10 @@ class BotLogger:
         """Log exception with traceback."""
         self.logger.exception(message, *args, **kwargs)
         
+    def isEnabledFor(self, level):
+        """Check whether messages at the given level would be emitted."""
+        return self.logger.isEnabledFor(level)
+        
     def log_function_call(self, func_name, *args, **kwargs):
         """Log function call with arguments."""
         args_str = ', '.join([str(arg) for arg in args])
@@ -140,10 +144,18 @@ class BotLogger:
         """Log bot events with structured format."""
         self.info(f"Bot Event [{event_type}]: {details}")
         
-    def log_command_usage(self, command, user, guild, success=True):
-        """Log command usage."""
+    def log_command_usage(self, command, user, user_id, guild=None, guild_id=None, success=True):
+        """
+        Log command usage.
+        
+        User and guild objects are only converted to strings if INFO is enabled.
+        A guild of None is logged as a DM.
+        """
         status = "SUCCESS" if success else "FAILED"
-        self.info(f"Command [{status}]: '{command}' by {user} in {guild}")
+        if guild is None:
+            self.info("Command [%s]: '%s' by %s (%s) in DM", status, command, user, user_id)
+        else:
+            self.info("Command [%s]: '%s' by %s (%s) in %s (%s)", status, command, user, user_id, guild, guild_id)
         
     def log_error_with_context(self, error, context=None):
         """Log error with additional context."""
@@ -156,6 +168,71 @@ class BotLogger:
 # Global logger instances
 _loggers = {}
 
+# Guards _loggers and the shared handlers below; reentrant because setup_logger
+# holds it while a new BotLogger fetches its handlers
+_lock = threading.RLock()
+_console_handler = None
+_file_handlers = {}  # log file path -> RotatingFileHandler
+
+# Log records from every logger go through one queue to one listener thread
+_queue = queue.SimpleQueue()
+_queue_handler = None
+_sinks = {}  # logger name -> handlers its records are written to
+
+class _SinkRouter(logging.Handler):
+    """Pass each dequeued record to the handlers registered for its logger."""
+    
+    def emit(self, record):
+        for handler in _sinks.get(record.name, ()):
+            handler.handle(record)
+            
+def _get_queue_handler():
+    """Return the shared queue handler, starting the listener thread on first use."""
+    global _queue_handler
+    with _lock:
+        if _queue_handler is None:
+            _queue_handler = QueueHandler(_queue)
+            listener = QueueListener(_queue, _SinkRouter())
+            listener.start()
+            # Flush whatever is still queued when the process exits
+            atexit.register(listener.stop)
+        return _queue_handler
+
+def _get_console_handler():
+    """Return the console handler shared by all loggers, creating it on first use."""
+    global _console_handler
+    with _lock:
+        if _console_handler is None:
+            _console_handler = logging.StreamHandler(sys.stdout)
+            _console_handler.setFormatter(ColoredFormatter())
+        return _console_handler
+        
+def _get_file_handler(log_file_path):
+    """Return the rotating file handler for a path, so each file is opened only once."""
+    with _lock:
+        file_handler = _file_handlers.get(log_file_path)
+        if file_handler is None:
+            # Create logs directory if it doesn't exist
+            log_dir = os.path.dirname(log_file_path)
+            if log_dir and not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+                
+            # Rotating file handler (10MB max, 5 backup files)
+            file_handler = RotatingFileHandler(
+                log_file_path,
+                maxBytes=10*1024*1024,  # 10MB
+                backupCount=5
+            )
+            
+            # File formatter (more detailed)
+            file_formatter = logging.Formatter(
+                fmt='%(asctime)s | %(levelname)-8s | %(name)-12s | %(funcName)-15s | %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+            file_handler.setFormatter(file_formatter)
+            _file_handlers[log_file_path] = file_handler
+        return file_handler
+
 def setup_logger(name, level=None, log_to_file=None, log_file_path=None):
     """
     Setup and return a logger instance.
@@ -177,14 +254,15 @@ def setup_logger(name, level=None, log_to_file=None, log_file_path=None):
     if log_file_path is None:
         log_file_path = os.getenv('LOG_FILE_PATH', 'logs/bot.log')
         
-    # Return existing logger if already created
-    if name in _loggers:
-        return _loggers[name]
+    with _lock:
+        # Return existing logger if already created
+        if name in _loggers:
+            return _loggers[name]
+            
+        # Create new logger
+        logger = BotLogger(name, level, log_to_file, log_file_path)
+        _loggers[name] = logger
         
-    # Create new logger
-    logger = BotLogger(name, level, log_to_file, log_file_path)
-    _loggers[name] = logger
-    
     return logger
 
 def get_logger(name):